@@ -0,0 +1,854 @@
+import conflict_graph as cpcg
+import general as cpg
+import input as cpi
+import recognition as cprec
+import solution_drawer as cpsol
+import solution_exporter as cpexp
+from skimage.feature import match_template, peak_local_max
+from scipy.signal import fftconvolve
+from shapely.geometry import Polygon
+import shapely.affinity
+import numpy as np
+import cv2, glob, os, sys, tempfile, time, tracemalloc
+
+SEAT_WIDTH = 20
+SEAT_DEPTH = 24
+SEATS_PER_BANK = 14
+AISLE_WIDTH = 60
+PIXELS_TO_DISTANCE = 50.0
+EXAMPLE_ROOM_SEATS = 230
+EXAMPLE_ROOM = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            "ExampleRoom.png")
+# (x1, y1, x2, y2) box around a chair of the top seating block
+EXAMPLE_CHAIR = (595, 85, 640, 130)
+# (x1, y1, x2, y2) boxes around chairs of several seating blocks, used as
+# chair orientations
+EXAMPLE_CHAIRS = (EXAMPLE_CHAIR, (220, 160, 270, 200), (1295, 130, 1340, 175),
+                  (1440, 465, 1490, 510))
+FINDING_THRESHOLD = 0.6
+
+def synthetic_room(number_of_seats, seed = 0):
+    """Builds a synthetic lecture hall of number_of_seats chairs laid out in
+    rows of banks divided by aisles, with a little jitter on every chair.
+    Returns a (polygons, middles) pair like conflict_graph.chair_polygons.
+
+
+    Keyword arguments:
+
+    number_of_seats -- The number (int) of chairs in the room.
+
+    seed -- The seed (int) for the jitter on chair positions.
+    """
+    rng = np.random.default_rng(seed)
+    seats_per_row = 3 * SEATS_PER_BANK
+    shape = np.array([(2, 2), (18, 3), (17, 21), (10, 23), (3, 20)])
+    polygons = []
+    for seat in range(number_of_seats):
+        row = seat // seats_per_row
+        column = seat % seats_per_row
+        x = (column * (SEAT_WIDTH + 2)
+             + (column // SEATS_PER_BANK) * AISLE_WIDTH)
+        y = row * (SEAT_DEPTH + 2)
+        jitter = rng.integers(-2, 3, size = 2)
+        polygons.append(Polygon(shape + (x, y) + jitter))
+    middles = [polygon.centroid for polygon in polygons]
+    return polygons, middles
+
+def __best_time(function, repeats):
+    """Private helper returning the best wall time of repeats calls to
+    function along with its last result.
+    """
+    best = None
+    for repeat in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+def benchmark_conflict_edges(number_of_seats = 1500, repeats = 3):
+    """Times the pairwise distance loop against the STRtree conflict graph
+    builder confirming candidates with shapely and with the numpy kernel, and
+    checks that all three produce the same edges.
+
+
+    Keyword arguments:
+
+    number_of_seats -- The number (int) of chairs in the synthetic room.
+
+    repeats -- How many times (int) to run each builder, keeping the best.
+    """
+    polygons, middles = synthetic_room(number_of_seats)
+
+    def pairwise():
+        edgelist = []
+        for i in range(len(middles)):
+            for j in range(len(polygons)):
+                if (i != j):
+                    dist = polygons[j].distance(middles[i])
+                    if (dist <= PIXELS_TO_DISTANCE):
+                        edgelist.append((i, j))
+        return edgelist
+
+    loop_time, loop_edges = __best_time(pairwise, 1)
+    shapely_time, shapely_edges = __best_time(
+        lambda: cpcg.build_conflict_edges(polygons, middles,
+                                          PIXELS_TO_DISTANCE, "shapely"),
+        repeats)
+    numpy_time, numpy_edges = __best_time(
+        lambda: cpcg.build_conflict_edges(polygons, middles,
+                                          PIXELS_TO_DISTANCE, "numpy"),
+        repeats)
+    print("%d seats, %d directed edges" % (number_of_seats, len(loop_edges)))
+    print("pairwise loop:      %8.3f s" % loop_time)
+    print("STRtree + shapely:  %8.3f s" % shapely_time)
+    print("STRtree + numpy:    %8.3f s" % numpy_time)
+    print("same edges:", np.array_equal(loop_edges, shapely_edges)
+          and np.array_equal(loop_edges, numpy_edges))
+
+def benchmark_solver_backends(room_sizes = (EXAMPLE_ROOM_SEATS, 5000),
+                              solver_formulation = "clique",
+                              solver_time_limit = 120):
+    """Solves synthetic rooms the size of ExampleRoom.png and of a 5000 seat
+    hall exactly with every backend in input.SOLVER_BACKENDS, without graph
+    reductions so that the backends see the whole model, and prints the seats,
+    bound and solve time of each.
+
+
+    Keyword arguments:
+
+    room_sizes -- The numbers (int) of chairs in the synthetic rooms.
+
+    solver_formulation -- Either "edge" or "clique" (str), the constraints
+    to give the backends.
+
+    solver_time_limit -- The number of seconds (float) each solve may take.
+    """
+    for number_of_seats in room_sizes:
+        polygons, middles = synthetic_room(number_of_seats)
+        edges = cpcg.undirected_edges(
+            cpcg.build_conflict_edges(polygons, middles, PIXELS_TO_DISTANCE))
+        rows = []
+        for backend in cpi.SOLVER_BACKENDS:
+            solution = cpi.solve_graphs([(len(polygons), edges)],
+                                        solver_formulation,
+                                        graph_reductions = False,
+                                        solver_time_limit = solver_time_limit,
+                                        solver_backend = backend)[0]
+            rows.append((backend, solution))
+        print("%d seats, %d edges, %s formulation"
+              % (number_of_seats, len(edges), solver_formulation))
+        for backend, solution in rows:
+            print("%-8s %5d seats, bound %5d, %8.3f s%s"
+                  % (backend, solution.seats(), solution.bound,
+                     solution.solve_time,
+                     "" if solution.is_optimal() else ", not optimal"))
+
+def example_floor(tiles = 1):
+    """Returns ExampleRoom.png loaded as the planner loads it, repeated tiles
+    times in each direction to make a larger architectural plan, along with
+    the chair template cut from it.
+
+
+    Keyword argument:
+
+    tiles -- How many copies (int) of the room to place along each axis.
+    """
+    floor = cv2.imread(EXAMPLE_ROOM)
+    x1, y1, x2, y2 = EXAMPLE_CHAIR
+    template = floor[y1 : y2, x1 : x2].copy()
+    return np.tile(floor, (tiles, tiles, 1)), template
+
+def benchmark_template_matching(tiles = (1, 2, 3), skimage_tiles = (1,),
+                                repeats = 3):
+    """Times the original colour skimage chair matching against the grayscale
+    cv2.matchTemplate and FFT engines of recognition on ExampleRoom.png and
+    on tiled copies of it, and checks that they all find the same chairs. The
+    skimage matching works on a float64 volume of every colour channel and
+    runs out of memory on large plans, so it is only run for skimage_tiles;
+    elsewhere the engines are checked against each other.
+
+
+    Keyword arguments:
+
+    tiles -- The numbers (int) of copies of the room along each axis to
+    benchmark on.
+
+    skimage_tiles -- The numbers (int) of copies to also run skimage on.
+
+    repeats -- How many times (int) to run each of the new engines, keeping
+    the best.
+    """
+    for tile_count in tiles:
+        floor, template = example_floor(tile_count)
+        print("%d x %d floor" % (floor.shape[1], floor.shape[0]))
+        expected = None
+        if tile_count in skimage_tiles:
+
+            def original():
+                result = match_template(floor, template, pad_input = True)
+                return peak_local_max(result, min_distance = 1,
+                                      threshold_rel = FINDING_THRESHOLD)
+
+            skimage_time, skimage_points = __best_time(original, 1)
+            expected = set(map(tuple, skimage_points[:, :2].tolist()))
+            print("%-19s %8.3f s, %d chairs" % ("skimage colour:",
+                                                skimage_time, len(expected)))
+        for method in ("opencv", "fft"):
+            method_time, points = __best_time(
+                lambda: cprec.find_chairs(floor, template, FINDING_THRESHOLD,
+                                          method),
+                repeats)
+            found = set(map(tuple, points.tolist()))
+            if expected is None:
+                expected = found
+            print("%-19s %8.3f s, %d chairs, %d missing, %d extra"
+                  % (method + ":", method_time, len(found),
+                     len(expected - found), len(found - expected)))
+
+def benchmark_pyramid_search(tiles = (1, 3), pyramid_levels = (1, 2),
+                             thresholds = (0.5, FINDING_THRESHOLD, 0.7),
+                             repeats = 3):
+    """Times the coarse to fine pyramid chair search against the exhaustive
+    cv2.matchTemplate search on ExampleRoom.png and on tiled copies of it,
+    and reports its recall, the share of the exhaustively found chairs it
+    also finds, at each finding threshold.
+
+
+    Keyword arguments:
+
+    tiles -- The numbers (int) of copies of the room along each axis to
+    benchmark on.
+
+    pyramid_levels -- The numbers (int) of pyramid levels to try.
+
+    thresholds -- The finding thresholds (float) to check the recall at.
+
+    repeats -- How many times (int) to run each search, keeping the best.
+    """
+    for tile_count in tiles:
+        floor, template = example_floor(tile_count)
+        print("%d x %d floor" % (floor.shape[1], floor.shape[0]))
+        for threshold in thresholds:
+            exhaustive_time, points = __best_time(
+                lambda: cprec.find_chairs(floor, template, threshold),
+                repeats)
+            expected = set(map(tuple, points.tolist()))
+            print("threshold %.2f, exhaustive: %8.3f s, %d chairs"
+                  % (threshold, exhaustive_time, len(expected)))
+            for levels in pyramid_levels:
+                pyramid_time, points = __best_time(
+                    lambda: cprec.find_chairs(floor, template, threshold,
+                                              pyramid_levels = levels),
+                    repeats)
+                found = set(map(tuple, points.tolist()))
+                print("  %d level(s): %8.3f s, %.2fx, recall %.1f%%, %d extra"
+                      % (levels, pyramid_time,
+                         exhaustive_time / pyramid_time,
+                         100 * len(expected & found) / max(len(expected), 1),
+                         len(found - expected)))
+
+def benchmark_tiled_recognition(tiles = (1, 3), memory_budgets = (16, 64)):
+    """Compares the memory and time of the tiled chair search at each of
+    memory_budgets against searching the whole floor at once, on
+    ExampleRoom.png and on tiled copies of it. Memory is the peak traced by
+    tracemalloc, which counts NumPy arrays but not OpenCV's internal buffers.
+
+
+    Keyword arguments:
+
+    tiles -- The numbers (int) of copies of the room along each axis to
+    benchmark on.
+
+    memory_budgets -- The numbers of megabytes (int or float) each tile may
+    use.
+    """
+    for tile_count in tiles:
+        floor, template = example_floor(tile_count)
+        print("%d x %d floor" % (floor.shape[1], floor.shape[0]))
+        expected = None
+        for memory_budget in (None,) + tuple(memory_budgets):
+            tracemalloc.start()
+            start = time.perf_counter()
+            points = cprec.find_chairs_by_type(
+                floor, [template], FINDING_THRESHOLD, workers = 1,
+                memory_budget = memory_budget)[0]
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            found = set(map(tuple, points.tolist()))
+            if expected is None:
+                expected = found
+            name = ("whole floor:" if memory_budget is None
+                    else "%g MB tiles:" % memory_budget)
+            print("%-15s %8.3f s, peak %7.1f MB, %d chairs, %d missing, "
+                  "%d extra" % (name, elapsed, peak / 2 ** 20, len(found),
+                                len(expected - found), len(found - expected)))
+
+def benchmark_duplicate_suppression(thresholds = (0.3, 0.5,
+                                                FINDING_THRESHOLD, 0.7),
+                                    max_overlaps = (0.3, 0.5, 0.7)):
+    """Recognizes the chairs of ExampleRoom.png under the orientations of
+    EXAMPLE_CHAIRS and reports how many detections, each of which would
+    become a node of the conflict graph, are left after removing duplicates
+    at each of max_overlaps. The template boxes are used as chair polygons.
+    The lowest threshold finds over 10,000 detections, where measuring the
+    overlap of every pair with GEOS used to take minutes.
+
+
+    Keyword arguments:
+
+    thresholds -- The finding thresholds (float) to recognize chairs at.
+
+    max_overlaps -- The intersection over union thresholds (float) to try.
+    """
+    floor = cv2.imread(EXAMPLE_ROOM)
+    templates = [floor[y1 : y2, x1 : x2] for x1, y1, x2, y2 in EXAMPLE_CHAIRS]
+    for threshold in thresholds:
+        polygons = []
+        scores = []
+        found = cprec.find_chairs_by_type(floor, templates, threshold,
+                                          return_scores = True)
+        for template, (points, type_scores) in zip(templates, found):
+            height, width = template.shape[:2]
+            for row, column in points.tolist():
+                left = column - width / 2
+                top = row - height / 2
+                polygons.append(Polygon([(left, top), (left + width, top),
+                                         (left + width, top + height),
+                                         (left, top + height)]))
+            scores.extend(type_scores.tolist())
+        for max_overlap in max_overlaps:
+            start = time.perf_counter()
+            keep = cprec.suppress_duplicates(polygons, scores, max_overlap)
+            print("threshold %.2f, overlap %.1f: %d nodes before, %d after, "
+                  "%.3f s" % (threshold, max_overlap, len(polygons),
+                              len(keep), time.perf_counter() - start))
+
+def benchmark_recognition_cache(thresholds = (FINDING_THRESHOLD, 0.5, 0.7)):
+    """Recognizes the chairs of ExampleRoom.png under the orientations of
+    EXAMPLE_CHAIRS without a cache, then with an empty cache directory and
+    again at each of thresholds, which only finds peaks in the cached
+    correlations.
+
+
+    Keyword argument:
+
+    thresholds -- The finding thresholds (float) to run again with.
+    """
+    floor = cv2.imread(EXAMPLE_ROOM)
+    templates = [floor[y1 : y2, x1 : x2] for x1, y1, x2, y2 in EXAMPLE_CHAIRS]
+    runs = [("no cache", thresholds[0], None)]
+    with tempfile.TemporaryDirectory() as cache_dir:
+        runs.append(("empty cache", thresholds[0], cache_dir))
+        runs.extend(("cached", threshold, cache_dir)
+                    for threshold in thresholds)
+        for name, threshold, directory in runs:
+            start = time.perf_counter()
+            found = cprec.find_chairs_by_type(floor, templates, threshold,
+                                              cache_dir = directory)
+            print("%-12s threshold %.2f: %7.3f s, %d chairs"
+                  % (name + ":", threshold, time.perf_counter() - start,
+                     sum(len(points) for points in found)))
+
+def benchmark_threshold_slider(thresholds = (0.5, FINDING_THRESHOLD, 0.7),
+                               repeats = 3):
+    """Times what moving the threshold slider of chair recognition costs,
+    finding the chairs of ExampleRoom.png under the orientations of
+    EXAMPLE_CHAIRS again in correlation maps kept in memory, against
+    recognizing them from scratch at each of thresholds.
+
+
+    Keyword arguments:
+
+    thresholds -- The finding thresholds (float) to move the slider to.
+
+    repeats -- How many times (int) to run each, keeping the best.
+    """
+    floor = cv2.imread(EXAMPLE_ROOM)
+    templates = [floor[y1 : y2, x1 : x2] for x1, y1, x2, y2 in EXAMPLE_CHAIRS]
+    results = cprec.match_templates(floor, templates)
+    for threshold in thresholds:
+        full_time, found = __best_time(
+            lambda: cprec.find_chairs_by_type(floor, templates, threshold),
+            repeats)
+        slider_time, slider_found = __best_time(
+            lambda: cprec.find_chairs_in_results(results, threshold), repeats)
+        same = all(np.array_equal(points, slider_points)
+                   for points, (slider_points, scores)
+                   in zip(found, slider_found))
+        print("threshold %.2f: %7.3f s from scratch, %7.3f s re-peaked, "
+              "same chairs: %s" % (threshold, full_time, slider_time, same))
+
+def benchmark_template_bank(angle_step = 15, match_radius = 12):
+    """Times matching a bank of the EXAMPLE_CHAIR template turned every
+    angle_step degrees on ExampleRoom.png with the shared FFT of
+    match_template_bank against one masked cv2.matchTemplate call per
+    variant, then checks how many of the chairs recognized with all of the
+    hand selected EXAMPLE_CHAIRS orientations each single orientation finds
+    on its own when turned by multiples of 90 degrees.
+
+
+    Keyword arguments:
+
+    angle_step -- The angle (int, in degrees) between the variants of the
+    timed bank.
+
+    match_radius -- The distance (int or float, in pixels) within which two
+    chair centers count as the same chair. Turned chairs are centered on the
+    turned template box, which is rarely centered on the chair itself.
+    """
+    floor = cv2.imread(EXAMPLE_ROOM)
+    templates = [floor[y1 : y2, x1 : x2] for x1, y1, x2, y2 in EXAMPLE_CHAIRS]
+    bank = cprec.template_bank(templates[0], range(0, 360, angle_step))
+    start = time.perf_counter()
+    cprec.match_template_bank(floor, bank)
+    bank_time = time.perf_counter() - start
+    gray = cprec.to_grayscale(floor)
+    start = time.perf_counter()
+    for angle, scale, variant, mask in bank:
+        height, width = variant.shape
+        padded = cv2.copyMakeBorder(gray, height // 2,
+                                    height - 1 - height // 2, width // 2,
+                                    width - 1 - width // 2,
+                                    cv2.BORDER_CONSTANT, value = 0)
+        cv2.matchTemplate(padded, variant, cv2.TM_CCOEFF_NORMED, mask = mask)
+    masked_time = time.perf_counter() - start
+    print("%d variants: %.2f s shared FFT, %.2f s masked cv2.matchTemplate"
+          % (len(bank), bank_time, masked_time))
+
+    def recognized(found, found_templates):
+        polygons = []
+        scores = []
+        centers = []
+        for template, type_found in zip(found_templates, found):
+            height, width = template.shape[:2]
+            for (row, column), score in zip(type_found[0].tolist(),
+                                            type_found[1].tolist()):
+                left = column - width / 2
+                top = row - height / 2
+                polygons.append(Polygon([(left, top), (left + width, top),
+                                         (left + width, top + height),
+                                         (left, top + height)]))
+                scores.append(score)
+                centers.append((row, column))
+        keep = cprec.suppress_duplicates(polygons, scores)
+        return np.array(centers, dtype = np.float64)[keep]
+
+    expected = recognized(cprec.find_chairs_by_type(floor, templates,
+                                                    FINDING_THRESHOLD,
+                                                    return_scores = True),
+                          templates)
+    print("%d chairs with all %d orientations"
+          % (len(expected), len(templates)))
+    for index, template in enumerate(templates):
+        bank = cprec.template_bank(template, (0, 90, 180, 270))
+        found = cprec.find_chairs_in_banks(
+            [cprec.match_template_bank(floor, bank)], [bank],
+            FINDING_THRESHOLD)
+        centers = recognized(found, [template])
+        distances = np.sqrt(((expected[:, None] - centers[None]) ** 2)
+                            .sum(axis = 2))
+        print("orientation %d turned: %d chairs, finds %d of the %d, "
+              "%d extra" % (index, len(centers),
+                            np.sum(distances.min(axis = 1) <= match_radius),
+                            len(expected),
+                            np.sum(distances.min(axis = 0) > match_radius)))
+
+def benchmark_image_plane(tiles = (1, 3), pyramid_levels = 2, repeats = 3):
+    """Times what a pyramid chair search spends converting and halving
+    ExampleRoom.png, repeated tiles times in each direction, when it is given
+    the cv2 image, as on every move of the threshold slider, against reading
+    them from an ImagePlane that keeps them, and checks that both searches
+    find the same chairs under the orientations of EXAMPLE_CHAIRS.
+
+
+    Keyword arguments:
+
+    tiles -- The numbers (int) of copies of the plan along each side.
+
+    pyramid_levels -- The number (int) of pyramid levels to search with.
+
+    repeats -- How many times (int) to run each, keeping the best.
+    """
+    for count in tiles:
+        floor, template = example_floor(count)
+        templates = [floor[y1 : y2, x1 : x2]
+                     for x1, y1, x2, y2 in EXAMPLE_CHAIRS]
+        image_plane = cprec.ImagePlane(floor)
+
+        def derive():
+            coarse = cprec.to_grayscale(floor)
+            for level in range(pyramid_levels):
+                coarse = cv2.pyrDown(coarse)
+            return coarse
+
+        derive_time, coarse = __best_time(derive, repeats)
+        first_time, plane_coarse = __best_time(
+            lambda: cprec.ImagePlane(floor).get_pyramid_level(
+                pyramid_levels), repeats)
+        kept_time, plane_coarse = __best_time(
+            lambda: image_plane.get_pyramid_level(pyramid_levels), repeats)
+        found = cprec.find_chairs_by_type(floor, templates, FINDING_THRESHOLD,
+                                          pyramid_levels = pyramid_levels)
+        plane_found = cprec.find_chairs_by_type(
+            image_plane, templates, FINDING_THRESHOLD,
+            pyramid_levels = pyramid_levels)
+        same = all(np.array_equal(points, plane_points)
+                   for points, plane_points in zip(found, plane_found))
+        print("%dx%d tiles: %7.1f ms per search from the image, %7.1f ms "
+              "once for a new plane, %7.3f ms kept, same chairs: %s"
+              % (count, count, derive_time * 1000, first_time * 1000,
+                 kept_time * 1000, same))
+
+def benchmark_integral_normalization(repeats = 3):
+    """Times the window variances that normalize the FFT cross correlation
+    of ExampleRoom.png with the orientations of EXAMPLE_CHAIRS, computed
+    from two FFT convolutions per template as the fft method used to,
+    against integral_window_variances with the integral images an ImagePlane
+    keeps, and checks that both give the same variances. Also times the
+    whole fft matching of all orientations against opencv's.
+
+
+    Keyword argument:
+
+    repeats -- How many times (int) to run each, keeping the best.
+    """
+    floor = cv2.imread(EXAMPLE_ROOM)
+    templates = [floor[y1 : y2, x1 : x2] for x1, y1, x2, y2 in EXAMPLE_CHAIRS]
+    gray = cprec.to_grayscale(floor).astype(np.float64)
+    image_plane = cprec.ImagePlane(floor)
+    integrals_time, integrals = __best_time(
+        lambda: cprec.ImagePlane(floor).get_integrals(), repeats)
+    print("integral images: %7.3f s once per room diagram" % integrals_time)
+    for template_shape in sorted(set(template.shape[:2]
+                                     for template in templates)):
+        height, width = template_shape
+
+        def fft_variances():
+            padded = cv2.copyMakeBorder(gray, height // 2,
+                                        height - 1 - height // 2, width // 2,
+                                        width - 1 - width // 2,
+                                        cv2.BORDER_CONSTANT, value = 0)
+            window = np.ones(template_shape)
+            window_sum = fftconvolve(padded, window, mode = 'valid')
+            window_square_sum = fftconvolve(padded ** 2, window,
+                                            mode = 'valid')
+            return np.maximum(window_square_sum
+                              - window_sum ** 2 / window.size, 0)
+
+        fft_time, expected = __best_time(fft_variances, repeats)
+        integral_time, variances = __best_time(
+            lambda: cprec.integral_window_variances(*integrals,
+                                                    template_shape),
+            repeats)
+        kept_time, kept = __best_time(
+            lambda: image_plane.get_window_variances(template_shape),
+            repeats)
+        print("%dx%d windows: %7.3f s with FFTs, %7.3f s from integral "
+              "images, %7.3f s kept, largest relative difference %.1e"
+              % (height, width, fft_time, integral_time, kept_time,
+                 np.abs(variances - expected).max() / expected.max()))
+    for method in ("fft", "opencv"):
+        match_time, results = __best_time(
+            lambda: cprec.match_templates(cprec.ImagePlane(floor), templates,
+                                          method), repeats)
+        print("%d orientations, %s method: %7.3f s"
+              % (len(templates), method, match_time))
+
+def synthetic_solution(number_of_seats):
+    """Returns a (floor, polygons, middles, in_solution, label) tuple of the
+    arguments solution_drawer.save_solution takes for the synthetic_room of
+    number_of_seats chairs, with every third chair in the solution, placed
+    on a blank room diagram just large enough for it.
+
+
+    Keyword argument:
+
+    number_of_seats -- The number (int) of chairs in the synthetic room.
+    """
+    polygons, middles = synthetic_room(number_of_seats)
+    margin = 2 * SEAT_DEPTH
+    polygons = [shapely.affinity.translate(polygon, margin, margin)
+                for polygon in polygons]
+    middles = [polygon.centroid for polygon in polygons]
+    right, bottom = np.max([polygon.bounds[2:] for polygon in polygons],
+                           axis = 0)
+    floor = np.full((int(bottom) + margin, int(right) + margin, 3), 255,
+                    dtype = np.uint8)
+    in_solution = np.arange(number_of_seats) % 3 == 0
+    label = "%d seats" % np.count_nonzero(in_solution)
+    return floor, polygons, middles, in_solution, label
+
+def __peak_memory(function):
+    """Private helper returning how many megabytes the peak resident memory
+    of the process rose by while running function, along with its result.
+    Unlike tracemalloc this includes memory allocated by C++ code, such as
+    matplotlib's canvas. The peak is reset through /proc, so this only works
+    on Linux.
+    """
+    def status(field):
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+
+    with open("/proc/self/clear_refs", "w") as file:
+        file.write("5")
+    start = status("VmRSS")
+    result = function()
+    return status("VmHWM") - start, result
+
+def benchmark_solution_rendering(number_of_seats = 2000, solution_dpi = 1000,
+                                 renderers = cpsol.SOLUTION_RENDERERS):
+    """Times saving the solution diagram of a synthetic room of
+    number_of_seats chairs, every third one in the solution, drawn on a
+    blank room diagram with each of renderers, and prints the size of the
+    files each writes, including the room diagram the svg refers to.
+
+
+    Keyword arguments:
+
+    number_of_seats -- The number (int) of chairs in the synthetic room.
+
+    solution_dpi -- The dpi (int) of the matplotlib figure.
+
+    renderers -- The renderers (str) to time, from
+    solution_drawer.SOLUTION_RENDERERS.
+    """
+    floor, polygons, middles, in_solution, label = synthetic_solution(
+        number_of_seats)
+    with tempfile.TemporaryDirectory() as directory:
+        for renderer in renderers:
+            solution_name = os.path.join(directory, renderer)
+            start = time.perf_counter()
+            cpsol.save_solution(floor, polygons, middles, in_solution,
+                                PIXELS_TO_DISTANCE, label, solution_name,
+                                solution_dpi, renderer)
+            elapsed = time.perf_counter() - start
+            size = sum(os.path.getsize(path)
+                       for path in glob.glob(solution_name + "*"))
+            print("%d seats, %s: %7.2f s, %8.1f kB"
+                  % (number_of_seats, renderer, elapsed, size / 1024))
+
+def benchmark_solution_collections(number_of_seats = 2000,
+                                   solution_dpi = 1000):
+    """Compares the matplotlib solution diagram of a synthetic_solution of
+    number_of_seats chairs plotted with one plot, fill and circle artist per
+    seat, as solve_room used to, against the collections the matplotlib
+    renderer now uses: the time and peak memory taken to plot and save each
+    at solution_dpi, and how far apart the saved images are.
+
+
+    Keyword arguments:
+
+    number_of_seats -- The number (int) of chairs in the synthetic room.
+
+    solution_dpi -- The dpi (int) of the matplotlib figure.
+    """
+    import matplotlib.pyplot as plt
+
+    floor, polygons, middles, in_solution, label = synthetic_solution(
+        number_of_seats)
+
+    def per_seat(solution_name):
+        plt.rc('xtick', labelsize = 4)
+        plt.rc('ytick', labelsize = 4)
+        fig, ax = plt.subplots(dpi = solution_dpi)
+        plt.axis('off')
+        for axis in ['top', 'bottom', 'left', 'right']:
+            ax.spines[axis].set_linewidth(0.5)
+        for i in range(len(in_solution)):
+            xz, yz = polygons[i].exterior.xy
+            if not in_solution[i]:
+                ax.plot(xz, yz, color = 'blue', alpha = 1, linewidth = 0.2,
+                        solid_capstyle = 'round', zorder = 2)
+                ax.fill(xz, yz, alpha = 0.6, fc = 'lightblue',
+                        ec = 'darkblue', linewidth = 0.15, zorder = 2)
+            else:
+                ax.plot(xz, yz, color = 'orange', alpha = 1, linewidth = 0.2,
+                        solid_capstyle = 'round', zorder = 3)
+                ax.fill(xz, yz, alpha = 0.6, fc = 'orange', ec = 'darkred',
+                        linewidth = 0.15, zorder = 3)
+                ax.add_artist(plt.Circle((middles[i].x, middles[i].y),
+                                         PIXELS_TO_DISTANCE, fill = False,
+                                         ec = 'darkblue', ls = '--',
+                                         lw = 0.2, zorder = 4))
+        plt.text(10, 10, label, fontsize = 6, color = 'red',
+                 horizontalalignment = 'left', verticalalignment = 'top')
+        ax.imshow(floor)
+        plt.savefig(solution_name + ".jpg", orientation = 'portrait',
+                    format = 'jpg', dpi = solution_dpi)
+        plt.close(fig)
+
+    def collections(solution_name):
+        cpsol.save_solution(floor, polygons, middles, in_solution,
+                            PIXELS_TO_DISTANCE, label, solution_name,
+                            solution_dpi, "matplotlib")
+
+    images = []
+    with tempfile.TemporaryDirectory() as directory:
+        for name, plot in (("per seat artists", per_seat),
+                           ("collections", collections)):
+            solution_name = os.path.join(directory, name.replace(" ", "_"))
+            start = time.perf_counter()
+            peak, result = __peak_memory(lambda: plot(solution_name))
+            elapsed = time.perf_counter() - start
+            images.append(cv2.imread(solution_name + ".jpg"))
+            print("%d seats, %s: %7.2f s, peak memory +%.0f MB"
+                  % (number_of_seats, name, elapsed, peak))
+    difference = np.abs(images[0].astype(np.int16) - images[1])
+    print("images differ by %.2f on average, %.3f%% of pixels by more than "
+          "32" % (difference.mean(),
+                  100 * np.mean(difference.max(axis = 2) > 32)))
+
+def synthetic_room_info(number_of_seats):
+    """Returns a RoomInfo of the synthetic_room of number_of_seats chairs,
+    all of one chair orientation, with its conflict edges set and every
+    third chair in the solution, as solve_room leaves it for
+    solution_exporter.export_solution.
+
+
+    Keyword argument:
+
+    number_of_seats -- The number (int) of chairs in the synthetic room.
+    """
+    floor, polygons, middles, in_solution, _ = synthetic_solution(
+        number_of_seats)
+    room_info = cpg.RoomInfo({"floor" : "synthetic"}, {})
+    room_info.set_image_plane(cprec.ImagePlane(floor))
+    room_info.set_new_scale((0, 0), (int(PIXELS_TO_DISTANCE), 10), 1,
+                            "Horizontal", 1)
+    room_info.set_new_chair_types([(0, 0), (SEAT_WIDTH, SEAT_DEPTH)], floor)
+    chair_type = room_info.get_chair_types()[0]
+    #The chair's polygon about the middle of its chair orientation
+    points = [(int(x), int(y)) for x, y in np.array(
+        polygons[0].exterior.coords[:-1]) - middles[0].coords[0]
+              + (SEAT_WIDTH // 2, SEAT_DEPTH // 2)]
+    chair_poly = room_info.create_new_chair_poly(chair_type, points)
+    room_info.set_chair_polys([chair_poly])
+    room_info.set_chairs([room_info.create_new_chair(
+        chair_type, chair_poly, (int(middle.x), int(middle.y)))
+                          for middle in middles])
+    chairs = room_info.get_chairs()
+    polygons, middles = cpcg.chair_polygons(chairs)
+    room_info.set_conflict_edges(cpcg.undirected_edges(
+        cpcg.build_conflict_edges(polygons, middles, PIXELS_TO_DISTANCE)))
+    room_info.set_chairs_in_sol([chairs[i]
+                                 for i in np.flatnonzero(in_solution)])
+    return room_info
+
+def benchmark_solution_export(number_of_seats = 2000,
+                              formats = cpexp.SOLUTION_EXPORT_FORMATS):
+    """Times exporting the synthetic_room_info of number_of_seats chairs in
+    each of formats, and prints the size of the files each writes.
+
+
+    Keyword arguments:
+
+    number_of_seats -- The number (int) of chairs in the synthetic room.
+
+    formats -- The formats (str) to time, from
+    solution_exporter.SOLUTION_EXPORT_FORMATS.
+    """
+    room_info = synthetic_room_info(number_of_seats)
+    print("%d seats, %d conflicts"
+          % (number_of_seats, len(room_info.get_conflict_edges())))
+    with tempfile.TemporaryDirectory() as directory:
+        for export_format in formats:
+            solution_name = os.path.join(directory, export_format)
+            start = time.perf_counter()
+            cpexp.export_solution(room_info, solution_name, [export_format])
+            elapsed = time.perf_counter() - start
+            size = sum(os.path.getsize(path)
+                       for path in glob.glob(solution_name + "*"))
+            print("%d seats, %s: %7.3f s, %8.1f kB"
+                  % (number_of_seats, export_format, elapsed, size / 1024))
+
+def __room_json(room_info, json_save_name):
+    """Private helper saving room_info to json_save_name and returning a
+    RoomInfo loaded back from it, with the time each took.
+    """
+    start = time.perf_counter()
+    room_info.save_to_json(json_save_name)
+    saved = time.perf_counter() - start
+    loaded = cpg.RoomInfo(room_info.parameters_dict, {})
+    loaded.set_image_plane(room_info.get_image_plane())
+    start = time.perf_counter()
+    loaded.load_from_json(json_save_name)
+    return loaded, saved, time.perf_counter() - start
+
+def benchmark_room_round_trip(number_of_seats = 2000):
+    """Times saving the solved synthetic_room_info of number_of_seats chairs
+    with RoomInfo.save_to_json and loading it back with load_from_json,
+    checking that the chairs and solution come back the same. It then
+    removes a chair of the solution, as returning to Chair Deletion after
+    Solve Room does, and checks that the room saves and loads unsolved.
+
+
+    Keyword argument:
+
+    number_of_seats -- The number (int) of chairs in the synthetic room.
+    """
+    room_info = synthetic_room_info(number_of_seats)
+    room_info.parameters_dict.update({"units_to_distance" : 1,
+                                      "scale_orientation" : "Horizontal",
+                                      "scale_length_units" : 1})
+    completions = dict.fromkeys(room_info.get_completions(), True)
+    room_info.set_completions(completions)
+
+    def seats(room):
+        chairs = room.get_chairs()
+        indices = {id(chair) : index for index, chair in enumerate(chairs)}
+        return ([(chair.coords, chair.angle, chair.scale)
+                 for chair in chairs],
+                sorted(indices[id(chair)]
+                       for chair in room.get_chairs_in_sol()))
+
+    with tempfile.TemporaryDirectory() as directory:
+        json_save_name = os.path.join(directory, "room.json")
+        loaded, saved, load = __room_json(room_info, json_save_name)
+        print("%d seats: saved in %.3f s, %.1f kB, loaded in %.3f s"
+              % (number_of_seats, saved,
+                 os.path.getsize(json_save_name) / 1024, load))
+        assert(seats(loaded) == seats(room_info)), ("The loaded room differs "
+                                                    "from the saved one.")
+        assert(np.array_equal(loaded.get_conflict_edges(),
+                              room_info.get_conflict_edges())), (
+                                  "The loaded conflict edges differ from the "
+                                  "saved ones.")
+
+        #Deleting a chair of the solution leaves the room to be solved again
+        room_info.remove_chair(room_info.get_chairs_in_sol()[0])
+        loaded, _, _ = __room_json(room_info, json_save_name)
+        assert(len(loaded.get_chairs())
+               == number_of_seats - 1), ("The edited chairs were not saved.")
+        assert(loaded.get_chairs_in_sol() is cpg.NOT_SET
+               and loaded.get_conflict_edges() is cpg.NOT_SET
+               and not loaded.get_completions()["Solve Room Status"]), (
+                   "The solution of the edited room was saved.")
+        print("%d seats: editing after solving saves the room unsolved"
+              % number_of_seats)
+
+BENCHMARKS = {"conflict_edges" : benchmark_conflict_edges,
+              "solver_backends" : benchmark_solver_backends,
+              "template_matching" : benchmark_template_matching,
+              "pyramid_search" : benchmark_pyramid_search,
+              "tiled_recognition" : benchmark_tiled_recognition,
+              "duplicate_suppression" : benchmark_duplicate_suppression,
+              "recognition_cache" : benchmark_recognition_cache,
+              "threshold_slider" : benchmark_threshold_slider,
+              "template_bank" : benchmark_template_bank,
+              "image_plane" : benchmark_image_plane,
+              "integral_normalization" : benchmark_integral_normalization,
+              "solution_rendering" : benchmark_solution_rendering,
+              "solution_collections" : benchmark_solution_collections,
+              "solution_export" : benchmark_solution_export,
+              "room_round_trip" : benchmark_room_round_trip}
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        print("== %s ==" % name)
+        BENCHMARKS[name]()
@@ -0,0 +1,724 @@
+from shapely.geometry import Polygon
+from shapely.strtree import STRtree
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from collections import deque
+import heapq
+import numpy as np
+import shapely
+
+def chair_polygons(chairs):
+    """Builds the polygon of every chair in chairs translated to the chair's
+    position within the room diagram. Returns a (polygons, middles) pair of
+    lists where middles holds the centroid Point of each polygon.
+
+
+    Keyword argument:
+
+    chairs -- A list of _Chair objects.
+    """
+    polygons = []
+    middles = []
+    for chair in chairs:
+        #Turned and resized as recognized, see _Chair.polygon_points
+        polygon = Polygon(chair.polygon_points())
+        polygons.append(polygon)
+        middles.append(polygon.centroid)
+    return polygons, middles
+
+def polygon_vertex_array(polygons):
+    """Returns an (n, k, 2) float array holding the exterior vertices of each
+    of the n polygons provided, where k is the largest vertex count among them.
+    Polygons with fewer than k vertices are padded by repeating their last
+    vertex, which only adds zero length segments to them.
+
+
+    Keyword argument:
+
+    polygons -- A list of shapely Polygons.
+    """
+    exteriors = shapely.get_exterior_ring(np.array(polygons, dtype = object))
+    coordinates = shapely.get_coordinates(exteriors)
+    counts = shapely.get_num_coordinates(exteriors)
+    #Each ring repeats its first vertex at its end, which is dropped here
+    max_vertices = max(int(counts.max(initial = 2)) - 1, 1)
+    vertices = np.empty((len(counts), max_vertices, 2), dtype = np.float64)
+    ring_starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    for k in range(max_vertices):
+        vertex_index = ring_starts + np.minimum(k, counts - 2)
+        vertices[:, k] = coordinates[vertex_index]
+    return vertices
+
+def __edge_tables(vertices):
+    """Private helper that precomputes, for every polygon in vertices, the
+    x and y coordinates of its vertices, the x and y extents of its edges, the
+    inverse squared length of each edge and the inverse slope of each edge.
+    Zero length and horizontal edges get 0 in place of the inverses.
+    """
+    vx = np.ascontiguousarray(vertices[:, :, 0])
+    vy = np.ascontiguousarray(vertices[:, :, 1])
+    ex = np.roll(vx, -1, axis = 1) - vx
+    ey = np.roll(vy, -1, axis = 1) - vy
+    lengths = ex * ex + ey * ey
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        inverse_lengths = np.where(lengths > 0, 1.0 / lengths, 0.0)
+        inverse_slopes = np.where(ey != 0, ex / ey, 0.0)
+    return vx, vy, ex, ey, inverse_lengths, inverse_slopes
+
+def __table_distances(tables, points, polygon_index, point_index):
+    """Private helper computing point to polygon distances for the pairs given
+    from the tables built by __edge_tables.
+    """
+    vx, vy, ex, ey, inverse_lengths, inverse_slopes = (table[polygon_index]
+                                                       for table in tables)
+    px = points[point_index, 0][:, np.newaxis]
+    py = points[point_index, 1][:, np.newaxis]
+    dx = px - vx
+    dy = py - vy
+
+    #Distance from each point to the nearest edge of its polygon
+    t = np.clip((dx * ex + dy * ey) * inverse_lengths, 0.0, 1.0)
+    ox = dx - t * ex
+    oy = dy - t * ey
+    distances = np.sqrt((ox * ox + oy * oy).min(axis = 1))
+
+    #Even-odd rule to find the points that lie inside their polygon
+    crosses = (vy > py) != (vy + ey > py)
+    inside = np.logical_and(crosses, dx < dy * inverse_slopes).sum(axis = 1)
+    distances[inside % 2 == 1] = 0.0
+    return distances
+
+def point_polygon_distances(vertices, points, polygon_index, point_index):
+    """Returns the distance from points[point_index[m]] to the polygon
+    vertices[polygon_index[m]] for every m as a float array. A point inside a
+    polygon is at distance 0 from it, matching shapely's distance.
+
+
+    Keyword arguments:
+
+    vertices -- An (n, k, 2) float array of polygon vertices, as returned by
+    polygon_vertex_array.
+
+    points -- An (n, 2) float array of point coordinates.
+
+    polygon_index -- An int array of indices into vertices.
+
+    point_index -- An int array of indices into points, of the same length as
+    polygon_index.
+    """
+    return __table_distances(__edge_tables(vertices), points, polygon_index,
+                             point_index)
+
+def conflict_mask(vertices, points, polygon_index, point_index,
+                  pixels_to_distance, block_size = 8192):
+    """Returns a bool array that is True wherever the polygon
+    vertices[polygon_index[m]] lies within pixels_to_distance of the point
+    points[point_index[m]]. The pairs are processed in blocks of block_size so
+    that memory use stays bounded on rooms with many candidate pairs.
+
+
+    Keyword arguments:
+
+    vertices -- An (n, k, 2) float array of polygon vertices, as returned by
+    polygon_vertex_array.
+
+    points -- An (n, 2) float array of point coordinates.
+
+    polygon_index -- An int array of indices into vertices.
+
+    point_index -- An int array of indices into points.
+
+    pixels_to_distance -- The distance (int or float) in pixels that chairs
+    must be apart.
+
+    block_size -- The number (int) of pairs to process at once.
+    """
+    tables = __edge_tables(vertices)
+    mask = np.zeros(len(polygon_index), dtype = bool)
+    for start in range(0, len(polygon_index), block_size):
+        stop = start + block_size
+        distances = __table_distances(tables, points,
+                                      polygon_index[start:stop],
+                                      point_index[start:stop])
+        mask[start:stop] = distances <= pixels_to_distance
+    return mask
+
+def build_conflict_edges(polygons, points, pixels_to_distance,
+                         method = "numpy"):
+    """Builds the directed edges of the conflict graph of a room and returns
+    them as an (m, 2) int32 array. The edge (i, j) is included whenever
+    polygons[j] lies within pixels_to_distance of points[i] and i != j, which
+    is the same edge set the pairwise loop over every pair of chairs produced.
+    Pass the result through undirected_edges before building a model from it.
+
+    Rather than measuring the distance between every pair of chairs, the
+    polygons are put in an STRtree and each point only queries the polygons
+    whose bounding boxes intersect the square of half side pixels_to_distance
+    around it. Every polygon closer than pixels_to_distance is guaranteed to be
+    among those candidates, and each candidate is then confirmed with an exact
+    distance check. With method "numpy" the checks are done in blocks by
+    conflict_mask, while method "shapely" makes them through shapely.distance.
+
+
+    Keyword arguments:
+
+    polygons -- A list of shapely Polygons, one per chair.
+
+    points -- A list of shapely Points, one per chair. Usually the centroid of
+    the chair's polygon.
+
+    pixels_to_distance -- The distance (int or float) in pixels that chairs
+    must be apart.
+
+    method -- Either "numpy" or "shapely" (str), the way candidate pairs are
+    confirmed.
+    """
+    assert(len(polygons) == len(points)), ("polygons and points must have the "
+                                           "same length.")
+    assert(method == "numpy"
+           or method == "shapely"), ('method must be either "numpy" or '
+                                     '"shapely".')
+    if len(polygons) == 0:
+        return np.empty((0, 2), dtype = np.int32)
+    polygon_array = np.array(polygons, dtype = object)
+    point_array = np.array(points, dtype = object)
+    xs = shapely.get_x(point_array)
+    ys = shapely.get_y(point_array)
+    windows = shapely.box(xs - pixels_to_distance, ys - pixels_to_distance,
+                          xs + pixels_to_distance, ys + pixels_to_distance)
+
+    tree = STRtree(polygon_array)
+    point_index, polygon_index = tree.query(windows)
+    candidates = point_index != polygon_index
+    point_index = point_index[candidates]
+    polygon_index = polygon_index[candidates]
+
+    if method == "numpy":
+        close = conflict_mask(polygon_vertex_array(polygons),
+                              np.column_stack((xs, ys)), polygon_index,
+                              point_index, pixels_to_distance)
+    else:
+        distances = shapely.distance(polygon_array[polygon_index],
+                                     point_array[point_index])
+        close = distances <= pixels_to_distance
+    point_index = point_index[close]
+    polygon_index = polygon_index[close]
+
+    order = np.lexsort((polygon_index, point_index))
+    return np.column_stack((point_index[order],
+                            polygon_index[order])).astype(np.int32)
+
+def undirected_edges(edges):
+    """Returns the canonical undirected form of the edges provided as an
+    (m, 2) int32 array: every row (i, j) has i <= j, each pair appears once
+    and the rows are sorted. The directed edges (i, j) and (j, i) both become
+    the single row (i, j), so a model built from the result gets one
+    constraint per pair of conflicting chairs. A row (i, i) is kept and marks
+    a chair that can not be used at all.
+
+
+    Keyword argument:
+
+    edges -- An (m, 2) array or a list of (int, int) pair tuples.
+    """
+    edges = np.asarray(edges, dtype = np.int32).reshape(-1, 2)
+    return np.unique(np.sort(edges, axis = 1), axis = 0)
+
+def adjacency_sets(number_of_nodes, edges):
+    """Returns a list holding the set of neighbours of every node of the graph
+    with number_of_nodes nodes and the edges provided. Rows (i, i) are
+    ignored.
+
+
+    Keyword arguments:
+
+    number_of_nodes -- The number (int) of nodes in the graph.
+
+    edges -- An (m, 2) array or a list of (int, int) pair tuples.
+    """
+    neighbours = [set() for node in range(number_of_nodes)]
+    for i, j in np.asarray(edges, dtype = np.int64).reshape(-1, 2).tolist():
+        if i != j:
+            neighbours[i].add(j)
+            neighbours[j].add(i)
+    return neighbours
+
+def clique_cover(number_of_nodes, edges):
+    """Greedily covers the edges of a graph with maximal cliques and returns
+    them as a list of lists of nodes. Every edge lies within at least one of
+    the cliques, so the constraints sum(x[i] for i in clique) <= 1 allow
+    exactly the same independent sets as one x[i] + x[j] <= 1 constraint per
+    edge, while giving the solver fewer rows and a tighter relaxation. Rows
+    (i, i) are passed through as the clique [i, i].
+
+    Starting from each edge not yet covered, the clique is grown by adding the
+    common neighbour that keeps the most other common neighbours available.
+
+
+    Keyword arguments:
+
+    number_of_nodes -- The number (int) of nodes in the graph.
+
+    edges -- An (m, 2) array of undirected edges, as returned by
+    undirected_edges.
+    """
+    edges = np.asarray(edges, dtype = np.int64).reshape(-1, 2)
+    neighbours = adjacency_sets(number_of_nodes, edges)
+    covered = set()
+    cliques = []
+    for i, j in edges.tolist():
+        if i == j:
+            cliques.append([i, i])
+            continue
+        if (i, j) in covered:
+            continue
+        clique = [i, j]
+        candidates = neighbours[i] & neighbours[j]
+        while candidates:
+            best = max(sorted(candidates),
+                       key = lambda node: len(neighbours[node] & candidates))
+            clique.append(best)
+            candidates &= neighbours[best]
+        clique.sort()
+        for a in range(len(clique)):
+            for b in range(a + 1, len(clique)):
+                covered.add((clique[a], clique[b]))
+        cliques.append(clique)
+    return cliques
+
+def split_components(number_of_nodes, edges):
+    """Splits a graph into its connected components. Returns a list with one
+    (nodes, component_edges) pair per component, ordered by their smallest
+    node, where nodes is a sorted int array of the component's nodes and
+    component_edges is an (m, 2) int32 array of the component's edges
+    renumbered to index into nodes.
+
+
+    Keyword arguments:
+
+    number_of_nodes -- The number (int) of nodes in the graph.
+
+    edges -- An (m, 2) array of undirected edges, as returned by
+    undirected_edges.
+    """
+    edges = np.asarray(edges, dtype = np.int32).reshape(-1, 2)
+    graph = coo_matrix((np.ones(len(edges), dtype = np.int8),
+                        (edges[:, 0], edges[:, 1])),
+                       shape = (number_of_nodes, number_of_nodes))
+    number_of_components, labels = connected_components(graph,
+                                                        directed = False)
+    #Index of every node within its own component
+    local_index = np.zeros(number_of_nodes, dtype = np.int32)
+    members = [[] for component in range(number_of_components)]
+    for node, label in enumerate(labels.tolist()):
+        local_index[node] = len(members[label])
+        members[label].append(node)
+    edge_labels = labels[edges[:, 0]]
+    order = np.argsort(edge_labels, kind = 'stable')
+    bounds = np.searchsorted(edge_labels[order],
+                             np.arange(number_of_components + 1))
+
+    components = []
+    for label in range(number_of_components):
+        component_edges = edges[order[bounds[label]:bounds[label + 1]]]
+        components.append((np.array(members[label], dtype = np.int32),
+                           local_index[component_edges]))
+    return components
+
+
+class GraphReduction():
+    """GraphReduction is a class used to store the result of reduce_graph: the
+    kernel graph that is left for the solver after the reduction rules have
+    been applied, and the record of those rules needed to turn a solution of
+    the kernel back into a solution of the original graph.
+
+
+    Instance variables:
+
+    number_of_nodes -- The number (int) of nodes in the original graph.
+
+    number_of_edges -- The number (int) of edges in the original graph.
+
+    kernel_nodes -- An int array with the id of every node of the kernel.
+    Ids below number_of_nodes are nodes of the original graph, while larger
+    ids are nodes created by folding.
+
+    kernel_edges -- An (m, 2) int32 array of the kernel's edges renumbered to
+    index into kernel_nodes.
+
+    operations -- A list of the reductions applied, in order, as tuples.
+    ("include", v) and ("exclude", v) put node v in or out of the solution,
+    and ("fold", v, u, w, folded) merged the neighbours u and w of the degree
+    two node v into the node folded.
+
+
+    Public Method:
+
+    expand -- Turns a solution of the kernel into a solution of the original
+    graph.
+    """
+
+    def __init__(self, number_of_nodes, number_of_edges, kernel_nodes,
+                 kernel_edges, operations):
+        """Initializes an instance of the GraphReduction class. Instances
+        should be created through reduce_graph.
+
+
+        Keyword arguments:
+
+        number_of_nodes -- The number (int) of nodes in the original graph.
+
+        number_of_edges -- The number (int) of edges in the original graph.
+
+        kernel_nodes -- An int array with the ids of the kernel's nodes.
+
+        kernel_edges -- An (m, 2) int32 array of the kernel's edges.
+
+        operations -- The list of reductions applied, as tuples.
+        """
+        self.number_of_nodes = number_of_nodes
+        self.number_of_edges = number_of_edges
+        self.kernel_nodes = kernel_nodes
+        self.kernel_edges = kernel_edges
+        self.operations = operations
+
+    def expand(self, kernel_in_solution):
+        """Returns a bool array marking the nodes of the original graph in the
+        solution rebuilt from kernel_in_solution. If kernel_in_solution is a
+        maximum independent set of the kernel, the result is a maximum
+        independent set of the original graph.
+
+
+        Keyword argument:
+
+        kernel_in_solution -- A bool array marking, in the order of
+        kernel_nodes, the kernel nodes in the solution.
+        """
+        assert(len(kernel_in_solution)
+               == len(self.kernel_nodes)), ("kernel_in_solution must have one "
+                                            "value per kernel node.")
+        sol = dict(zip(self.kernel_nodes.tolist(),
+                       [bool(value) for value in kernel_in_solution]))
+        for operation in reversed(self.operations):
+            if operation[0] == "include":
+                sol[operation[1]] = True
+            elif operation[0] == "exclude":
+                sol[operation[1]] = False
+            else:
+                v, u, w, folded = operation[1:]
+                sol[u] = sol[folded]
+                sol[w] = sol[folded]
+                sol[v] = not sol[folded]
+        in_solution = np.zeros(self.number_of_nodes, dtype = bool)
+        for node in range(self.number_of_nodes):
+            in_solution[node] = sol[node]
+        return in_solution
+
+def reduce_graph(number_of_nodes, edges):
+    """Applies exact maximum independent set reduction rules to a graph until
+    none of them applies any more and returns a GraphReduction holding the
+    remaining kernel. The rules are:
+
+    self loop -- A node with an edge to itself can not be used.
+
+    isolated node -- A node without neighbours is always used.
+
+    pendant node -- A node with a single neighbour is used and that neighbour
+    is not.
+
+    domination -- If the closed neighbourhood of a node u lies within that of
+    its neighbour v, some maximum independent set does not use v, so v is
+    removed.
+
+    degree two folding -- A node v whose two neighbours u and w are not
+    adjacent is merged with them into a single new node connected to the
+    neighbours of u and w. The new node is used exactly when u and w are.
+
+
+    Keyword arguments:
+
+    number_of_nodes -- The number (int) of nodes in the graph.
+
+    edges -- An (m, 2) array of undirected edges, as returned by
+    undirected_edges.
+    """
+    edges = np.asarray(edges, dtype = np.int32).reshape(-1, 2)
+    adjacency = dict(enumerate(adjacency_sets(number_of_nodes, edges)))
+    operations = []
+    queue = deque()
+    queued = set()
+
+    def touch(node):
+        #A change around node can make rules apply to it or its neighbours
+        for other in [node] + sorted(adjacency.get(node, ())):
+            if other not in queued:
+                queued.add(other)
+                queue.append(other)
+
+    def remove(node):
+        for neighbour in adjacency.pop(node):
+            adjacency[neighbour].discard(node)
+            touch(neighbour)
+
+    for node in sorted(set(edges[edges[:, 0] == edges[:, 1], 0].tolist())):
+        operations.append(("exclude", node))
+        remove(node)
+    for node in sorted(adjacency):
+        touch(node)
+
+    next_node = number_of_nodes
+    while queue:
+        v = queue.popleft()
+        queued.discard(v)
+        if v not in adjacency:
+            continue
+        neighbours = adjacency[v]
+        if len(neighbours) == 0:
+            operations.append(("include", v))
+            remove(v)
+        elif len(neighbours) == 1:
+            u = next(iter(neighbours))
+            operations.append(("include", v))
+            operations.append(("exclude", u))
+            remove(u)
+            remove(v)
+        elif any(adjacency[u] - {v} <= neighbours for u in neighbours):
+            operations.append(("exclude", v))
+            remove(v)
+        elif (len(neighbours) == 2
+              and min(neighbours) not in adjacency[max(neighbours)]):
+            u, w = sorted(neighbours)
+            folded = next_node
+            next_node += 1
+            operations.append(("fold", v, u, w, folded))
+            folded_neighbours = (adjacency[u] | adjacency[w]) - {v}
+            remove(v)
+            remove(u)
+            remove(w)
+            adjacency[folded] = folded_neighbours
+            for neighbour in folded_neighbours:
+                adjacency[neighbour].add(folded)
+            touch(folded)
+
+    kernel_nodes = np.array(sorted(adjacency), dtype = np.int64)
+    local_index = dict(zip(kernel_nodes.tolist(), range(len(kernel_nodes))))
+    kernel_edges = [(local_index[v], local_index[u])
+                    for v in kernel_nodes.tolist() for u in adjacency[v]
+                    if v < u]
+    return GraphReduction(number_of_nodes, len(edges), kernel_nodes,
+                          undirected_edges(kernel_edges), operations)
+
+def csr_adjacency(number_of_nodes, edges):
+    """Returns the adjacency structure of the graph in compressed sparse row
+    form as an (indptr, indices) pair of int arrays: the neighbours of node i
+    are indices[indptr[i]:indptr[i + 1]], sorted. Rows (i, i) are left out.
+
+
+    Keyword arguments:
+
+    number_of_nodes -- The number (int) of nodes in the graph.
+
+    edges -- An (m, 2) array of undirected edges, as returned by
+    undirected_edges.
+    """
+    edges = np.asarray(edges, dtype = np.int64).reshape(-1, 2)
+    edges = edges[edges[:, 0] != edges[:, 1]]
+    rows = np.concatenate((edges[:, 0], edges[:, 1]))
+    columns = np.concatenate((edges[:, 1], edges[:, 0]))
+    order = np.lexsort((columns, rows))
+    indptr = np.zeros(number_of_nodes + 1, dtype = np.int64)
+    indptr[1:] = np.cumsum(np.bincount(rows, minlength = number_of_nodes))
+    return indptr, columns[order]
+
+def greedy_independent_set(number_of_nodes, edges):
+    """Returns a bool array marking a maximal independent set found by the
+    minimum degree greedy rule: the node with the fewest remaining neighbours
+    is used, it and its neighbours are removed from the graph, and this is
+    repeated until no nodes remain. Ties go to the smallest node. Nodes with a
+    row (i, i) are never used.
+
+
+    Keyword arguments:
+
+    number_of_nodes -- The number (int) of nodes in the graph.
+
+    edges -- An (m, 2) array of undirected edges, as returned by
+    undirected_edges.
+    """
+    edges = np.asarray(edges, dtype = np.int64).reshape(-1, 2)
+    indptr, indices = csr_adjacency(number_of_nodes, edges)
+    degree = np.diff(indptr)
+    removed = np.zeros(number_of_nodes, dtype = bool)
+    in_solution = np.zeros(number_of_nodes, dtype = bool)
+
+    def discard(node):
+        removed[node] = True
+        neighbours = indices[indptr[node]:indptr[node + 1]]
+        degree[neighbours] -= 1
+        return neighbours[~removed[neighbours]].tolist()
+
+    changed = []
+    for node in edges[edges[:, 0] == edges[:, 1], 0].tolist():
+        if not removed[node]:
+            changed += discard(node)
+    heap = [(degree[node], node) for node in range(number_of_nodes)
+            if not removed[node]]
+    heapq.heapify(heap)
+    while heap:
+        node_degree, node = heapq.heappop(heap)
+        if removed[node] or node_degree != degree[node]:
+            continue
+        in_solution[node] = True
+        removed[node] = True
+        changed = []
+        for neighbour in indices[indptr[node]:indptr[node + 1]].tolist():
+            if not removed[neighbour]:
+                changed += discard(neighbour)
+        for other in set(changed):
+            if not removed[other]:
+                heapq.heappush(heap, (degree[other], other))
+    return in_solution
+
+def local_search(number_of_nodes, edges, in_solution, plateau_moves = None,
+                 seed = 0):
+    """Improves the independent set marked by in_solution and returns the
+    result as a new bool array. Two moves are used:
+
+    1-swap -- A used node is swapped for a neighbour whose only used neighbour
+    it is. This keeps the size of the set, but moves it around the graph so
+    that 2-swaps become possible. plateau_moves of these are made at random.
+
+    2-swap -- A used node is swapped for two non-adjacent neighbours whose only
+    used neighbour it is, growing the set by one. These are applied until
+    none remain after the start and after every 1-swap.
+
+    Unused nodes without used neighbours are always added to the set.
+
+
+    Keyword arguments:
+
+    number_of_nodes -- The number (int) of nodes in the graph.
+
+    edges -- An (m, 2) array of undirected edges, as returned by
+    undirected_edges. Nodes with a row (i, i) are never used.
+
+    in_solution -- A bool array marking an independent set of the graph.
+
+    plateau_moves -- The number (int) of 1-swaps to make. Defaults to the
+    number of nodes.
+
+    seed -- The seed (int) used to pick the 1-swaps.
+    """
+    edges = np.asarray(edges, dtype = np.int64).reshape(-1, 2)
+    indptr, indices = csr_adjacency(number_of_nodes, edges)
+    blocked = np.zeros(number_of_nodes, dtype = bool)
+    blocked[edges[edges[:, 0] == edges[:, 1], 0]] = True
+    in_solution = np.array(in_solution, dtype = bool)
+    #tight[i] is the number of used neighbours of node i
+    tight = np.bincount(indices[np.repeat(in_solution, np.diff(indptr))],
+                        minlength = number_of_nodes)
+    if plateau_moves is None:
+        plateau_moves = number_of_nodes
+    rng = np.random.default_rng(seed)
+    pending = deque()
+    queued = set()
+
+    def neighbours(node):
+        return indices[indptr[node]:indptr[node + 1]]
+
+    def check(node):
+        #Queues the used nodes within two steps of node for 2-swaps
+        for near in [node] + neighbours(node).tolist():
+            for other in [near] + neighbours(near).tolist():
+                if in_solution[other] and other not in queued:
+                    queued.add(other)
+                    pending.append(other)
+
+    def insert(node):
+        in_solution[node] = True
+        tight[neighbours(node)] += 1
+        check(node)
+
+    def release(node):
+        in_solution[node] = False
+        tight[neighbours(node)] -= 1
+
+    def fill(node):
+        #Uses the neighbours of a released node that are left free
+        for neighbour in neighbours(node).tolist():
+            if (tight[neighbour] == 0 and not in_solution[neighbour]
+                and not blocked[neighbour]):
+                insert(neighbour)
+        check(node)
+
+    def adjacent(node, other):
+        near = neighbours(node)
+        position = np.searchsorted(near, other)
+        return position < len(near) and near[position] == other
+
+    def one_tight(node):
+        candidates = neighbours(node)
+        return candidates[(tight[candidates] == 1)
+                          & ~blocked[candidates]].tolist()
+
+    def two_swap(node):
+        candidates = one_tight(node)
+        for a in range(len(candidates)):
+            for b in range(a + 1, len(candidates)):
+                if not adjacent(candidates[a], candidates[b]):
+                    release(node)
+                    insert(candidates[a])
+                    insert(candidates[b])
+                    fill(node)
+                    return True
+        return False
+
+    def settle():
+        while pending:
+            node = pending.popleft()
+            queued.discard(node)
+            if in_solution[node]:
+                two_swap(node)
+
+    for node in np.flatnonzero((tight == 0) & ~in_solution
+                               & ~blocked).tolist():
+        if tight[node] == 0:
+            insert(node)
+    for node in np.flatnonzero(in_solution).tolist():
+        if node not in queued:
+            queued.add(node)
+            pending.append(node)
+    settle()
+
+    for move in range(plateau_moves):
+        used = np.flatnonzero(in_solution)
+        if len(used) == 0:
+            break
+        node = int(used[rng.integers(len(used))])
+        candidates = one_tight(node)
+        if not candidates:
+            continue
+        release(node)
+        insert(candidates[rng.integers(len(candidates))])
+        fill(node)
+        settle()
+    return in_solution
+
+def heuristic_independent_set(number_of_nodes, edges, seed = 0):
+    """Returns a bool array marking a large independent set of the graph found
+    by greedy_independent_set followed by local_search. This does not prove
+    the set is maximum but takes milliseconds for a classroom.
+
+
+    Keyword arguments:
+
+    number_of_nodes -- The number (int) of nodes in the graph.
+
+    edges -- An (m, 2) array of undirected edges, as returned by
+    undirected_edges. Nodes with a row (i, i) are never used.
+
+    seed -- The seed (int) used by local_search.
+    """
+    return local_search(number_of_nodes, edges,
+                        greedy_independent_set(number_of_nodes, edges),
+                        seed = seed)
@@ -1,9 +1,17 @@
-from shapely.geometry import Polygon, Point
+from shapely.geometry import Polygon
 import numpy as np
-import cv2
+import cv2, json, os
+import recognition as cprec
 
 NOT_SET = False
 DOT_SIZE = 1
+# Names the layout of the json files RoomInfo saves rooms to. The version is
+# raised whenever a field is removed or changes meaning, so that files saved
+# by an older version of the tool can still be told apart.
+ROOM_SCHEMA = "classroom-planner-room"
+ROOM_SCHEMA_VERSION = 1
+# Suffix of the png crops of chair orientation templates saved beside a room
+TEMPLATE_SUFFIX = "_chair_type_%d.png"
 
 GREEN = (0, 255, 0)
 PURPLE = (255, 0, 255)
@@ -424,14 +432,23 @@ class _Chair():
     coords -- An (int, int) pair tuple used as coordinates for the center of
     the possible chair that the _Chair object represents.
 
+    angle -- The angle (int or float, in degrees) the chair is turned by from
+    its chair orientation, counterclockwise as shown on screen.
 
-    Public Method:
+    scale -- The factor (int or float) the chair is larger than its chair
+    orientation by.
+
+
+    Public Methods:
+
+    polygon_points -- Returns the points of the chair's polygon within the
+    room diagram.
 
     draw -- Draws the instance in the provided image with the provided color
     and line width.
     """
 
-    def __init__(self, chair_type, chair_poly, coords):
+    def __init__(self, chair_type, chair_poly, coords, angle = 0, scale = 1):
         """Initializes an instance of the _Chair class. This should never be
         done directly; Users should work with _Chair through an instance of the
         RoomInfo class.
@@ -449,11 +466,32 @@ class _Chair():
 
         coords -- An (int, int) pair tuple used as coordinates for the center
         of the possible chair that the _Chair object will represent.
+
+        angle -- The angle (int or float, in degrees) the chair is turned by
+        from its chair orientation, counterclockwise as shown on screen.
+
+        scale -- The factor (int or float) the chair is larger than its chair
+        orientation by.
         """
 
         self.chair_type = chair_type
         self.chair_poly = chair_poly
         self.coords = coords
+        self.angle = angle
+        self.scale = scale
+
+    def polygon_points(self):
+        """Returns an (n, 2) float array of the (x, y) points of chair_poly
+        placed at coords within the room diagram, turned by angle and resized
+        by scale about coords.
+        """
+        points = (np.array(self.chair_poly.points, dtype = np.float64)
+                  + self.chair_poly.offsets)
+        if self.angle != 0 or self.scale != 1:
+            #The same turn cv2 gives the chair orientation's template
+            matrix = cv2.getRotationMatrix2D((0, 0), self.angle, self.scale)
+            points = points @ matrix[:, :2].T
+        return points + self.coords
 
     def draw(self, img, line_color, line_width):
         """Draws the _Chair object in img with color line_color and line width
@@ -472,16 +510,11 @@ class _Chair():
         """
         #TODO: add assert statements.
         assert(isinstance(line_width, int))
-        poly_points = self.chair_poly.points
-        x_center = self.coords[0] + self.chair_poly.offsets[0]
-        y_center = self.coords[1] + self.chair_poly.offsets[1]
+        poly_points = self.polygon_points().astype(int).tolist()
         for point in range(len(poly_points)):
-            line = cv2.line(img,
-                            (int(poly_points[point][0] + x_center),
-                             int(poly_points[point][1] + y_center)),
-                            (int(poly_points[point - 1][0] + x_center),
-                             int(poly_points[point - 1][1] + y_center)),
-                            line_color, line_width)
+            line = cv2.line(img, tuple(poly_points[point]),
+                            tuple(poly_points[point - 1]), line_color,
+                            line_width)
         cv2.circle(img, self.coords, DOT_SIZE, line_color, -1)
 
 
@@ -511,6 +544,12 @@ class RoomInfo():
     on a set of _Chair objects from _chairs that form a valid solution to the
     socially distanced seat assignment problem.
 
+    _conflict_edges -- An (m, 2) int32 array holding the undirected edges of
+    the room's conflict graph as indices into _chairs.
+
+    _image_plane -- The recognition.ImagePlane holding the room diagram and
+    the versions of it derived for chair recognition.
+
     _completions -- A dict maintaining information on which input methods have
     already been completed.
 
@@ -566,10 +605,25 @@ class RoomInfo():
 
     get_chairs_in_sol -- Returns the instance variable _chairs_in_solution.
 
+    set_conflict_edges -- Sets the instance variable _conflict_edges to the
+    provided array of edges.
+
+    get_conflict_edges -- Returns the instance variable _conflict_edges.
+
+    set_image_plane -- Sets the instance variable _image_plane to the provided
+    ImagePlane instance.
+
+    get_image_plane -- Returns the instance variable _image_plane.
+
     get_completions -- Returns the instance variable _completions.
 
     set_completions -- Sets the instance variable _completions to the provided
     completions dictionary if it is valid.
+
+    save_to_json -- Saves the room's inputs to a json file.
+
+    load_from_json -- Loads the room's inputs from a json file written by
+    save_to_json.
     """
 
     def __init__(self, parameters_dict, window_info_dict):
@@ -594,18 +648,16 @@ class RoomInfo():
                    computer (str).>
 
         "load_from_json" : <True or False (bool) whether or not to load the
-                            data from json_load_name.> (Currently not working)
+                            data from json_load_name.>
 
         "json_load_name" : <Json file to load data from if load_from_json is
-                           True (str).> (Currently not working)
+                           True (str).>
 
         "save_to_json" : <True or False (bool) whether or not to save the data
-                          stored in room_info to a json file.> (Currently not
-                          working)
+                          stored in room_info to a json file.>
 
         "json_save_name" : <The name of the json to save the data to if
-                            save_to_json is True (str).> (Currently not
-                            working)
+                            save_to_json is True (str).>
 
         "scale_length_units" : <How many units long the room diagram's scale is
                                 (int or float).>
@@ -629,6 +681,86 @@ class RoomInfo():
         "show_instructions" : <Whether or not to show instructions to the user
                                when having them make inputs. True or False
                                (bool).>
+
+        "solver_formulation" : <How to write the seat conflicts as solver
+                                constraints (str). Either "edge" for one
+                                constraint per conflicting pair of seats or
+                                "clique" for one constraint per clique of a
+                                clique cover of the conflict graph.>
+
+        "solver_workers" : <The number of worker processes (int) used to solve
+                            the independent components of the conflict graph.
+                            1 solves them in the tool's own process.>
+
+        "graph_reductions" : <Whether or not to shrink the conflict graph with
+                              exact reduction rules before solving it. True or
+                              False (bool).>
+
+        "solver_mode" : <How to solve for the seating (str). "exact" for a
+                         proven optimum, "heuristic" for a fast seating
+                         without proof or "hybrid" for the exact solver
+                         started from the heuristic seating, which only
+                         the SCIP and CP-SAT solver_backend read.>
+
+        "solver_time_limit" : <The number of seconds (float) the solver may
+                               run for, or None for no limit.>
+
+        "solver_gap" : <The relative gap (float) to the bound at which the
+                        solver may stop, or None for the solver's default.>
+
+        "solver_threads" : <The number of threads (int) the solver may use.>
+
+        "solver_progress" : <Whether or not the solver prints its progress.
+                             True or False (bool).>
+
+        "solver_backend" : <The exact solver to use (str). One of "CBC",
+                            "SCIP" or "CP-SAT".>
+
+        "recognition_workers" : <The number of threads (int) used to search
+                                 for the chair orientations at the same time,
+                                 or None for one per CPU core.>
+
+        "recognition_pyramid_levels" : <The number of times (int) to halve
+                                        the room diagram for a coarse to fine
+                                        chair search, or 0 to search every
+                                        position.>
+
+        "recognition_memory_budget" : <The number of megabytes (int or
+                                       float) each tile of a tiled chair
+                                       search may use, or None to search the
+                                       whole room diagram at once.>
+
+        "recognition_max_overlap" : <The largest intersection over union
+                                     (float between 0 and 1) of the polygons
+                                     of two recognized chairs before the
+                                     lower scoring one is removed as a
+                                     duplicate, or None.>
+
+        "recognition_min_distance" : <The smallest distance (int or float,
+                                      in pixels) between the centers of two
+                                      recognized chairs before the lower
+                                      scoring one is removed as a duplicate,
+                                      or None.>
+
+        "recognition_cache_dir" : <The directory (str) to keep the results
+                                   of chair recognition in for later runs on
+                                   the same room diagram and chair
+                                   orientations, or None.>
+
+        "recognition_angles" : <The angles (ints or floats, in degrees) to
+                                also look for every chair orientation turned
+                                by, or None.>
+
+        "recognition_scales" : <The factors (ints or floats) to also look for
+                                every chair orientation resized by, or
+                                None.>
+
+        "solution_renderer" : <How to draw the solution image, "opencv",
+                               "matplotlib", "svg" or "pdf" (str).>
+
+        "solution_exports" : <The formats (list of str) to also save the
+                              solved room in, any of "json", "csv" and
+                              "parquet", or None.>
         }
 
         window_info_dict -- A dict containing other information for the tool
@@ -649,6 +781,8 @@ class RoomInfo():
         self._chair_polys = NOT_SET
         self._chairs = NOT_SET
         self._chairs_in_solution = NOT_SET
+        self._conflict_edges = NOT_SET
+        self._image_plane = NOT_SET
         self._completions = {"Scale Selection Status" : False,
                              "Chair Type Selection Status" : False,
                              "Polygon Creation Status" : False,
@@ -697,7 +831,8 @@ class RoomInfo():
                                              "ints.")
         return _ChairPoly(chair_type, points)
 
-    def create_new_chair(self, chair_type, chair_poly, coords):
+    def create_new_chair(self, chair_type, chair_poly, coords, angle = 0,
+                         scale = 1):
         """Initializes and returns a new instance of the _Chair class.
 
 
@@ -714,6 +849,12 @@ class RoomInfo():
 
         coords -- An (int, int) pair tuple used as coordinates for the center
         of the possible chair that the _Chair object will represent.
+
+        angle -- The angle (int or float, in degrees) the chair is turned by
+        from chair_type, counterclockwise as shown on screen.
+
+        scale -- The factor (int or float) the chair is larger than
+        chair_type by.
         """
         assert(isinstance(chair_type, _ChairType)), ("chair_type is not a "
                                                      "valid _ChairType object "
@@ -745,7 +886,10 @@ class RoomInfo():
             assert(isinstance(i, int)
                    or isinstance(i, float)), ("coords is not a valid tuple"
                                              " representing a point.")
-        return _Chair(chair_type, chair_poly, coords)
+        assert(isinstance(angle, (int, float))), "angle must be a number."
+        assert(isinstance(scale, (int, float))
+               and scale > 0), "scale must be a positive number."
+        return _Chair(chair_type, chair_poly, coords, angle, scale)
 
     def set_new_scale(self, point1, point2, units_to_distance,
                       scale_orientation, scale_length_units):
@@ -920,7 +1064,8 @@ class RoomInfo():
 
         list_of_chairs -- The list of _Chair objects to set _chairs to. Every
         _Chair object in list_of_chairs must have a chair_poly in the RoomInfo
-        instance variable _chair_polys.
+        instance variable _chair_polys. _chairs_in_solution and
+        _conflict_edges are reset, as they refer to the replaced chairs.
         """
         assert(isinstance(list_of_chairs, list)), ("list_of_chairs must be a "
                                                     "list of _Chair objects.")
@@ -934,6 +1079,7 @@ class RoomInfo():
              assert(has_valid_chair_poly), ("_Chair object in list_of_chairs "
                                             "has invalid chair_poly.")
         self._chairs = list_of_chairs
+        self.__reset_solution()
 
     def get_chairs(self):
         """Returns the list of _Chair objects stored in _chairs."""
@@ -946,7 +1092,8 @@ class RoomInfo():
         Keyword argument:
 
         chair -- The _Chair object to add to _chairs. chair.chair_poly must be
-        in the RoomInfo instance variable _chair_polys.
+        in the RoomInfo instance variable _chair_polys. _chairs_in_solution
+        and _conflict_edges are reset, as the room has to be solved again.
         """
         assert(isinstance(chair, _Chair)), ("chair must be a _Chair object.")
         has_valid_chair_poly = False
@@ -955,6 +1102,7 @@ class RoomInfo():
                 has_valid_chair_poly = True
         assert(has_valid_chair_poly), ("_Chair object has invalid chair_poly.")
         self._chairs.append(chair)
+        self.__reset_solution()
 
     def remove_chair(self, chair):
         """Removes the chair _Chair object from the instance variable _chairs.
@@ -963,7 +1111,8 @@ class RoomInfo():
         Keyword argument:
 
         chair -- The _Chair object to remove from _chairs. chair must be in
-        _chairs.
+        _chairs. _chairs_in_solution and _conflict_edges are reset, as the
+        room has to be solved again.
         """
         assert(isinstance(chair, _Chair)), ("chair must be a _Chair object.")
         in_chairs = False
@@ -972,6 +1121,14 @@ class RoomInfo():
                 in_chairs = True
         assert(in_chairs), "chair must be in _chairs."
         self._chairs.remove(chair)
+        self.__reset_solution()
+
+    def __reset_solution(self):
+        """Private helper resetting _chairs_in_solution and _conflict_edges
+        once _chairs changes, as both refer to the chairs by position.
+        """
+        self._chairs_in_solution = NOT_SET
+        self._conflict_edges = NOT_SET
 
     def set_chairs_in_sol(self, list_of_chairs):
         """Sets the instance variable _chairs_in_solution to the provided list
@@ -999,7 +1156,50 @@ class RoomInfo():
 
     def get_chairs_in_sol(self):
         """Returns the list of _Chair objects stored in _chairs_in_solution."""
-        return _chairs_in_solution
+        return self._chairs_in_solution
+
+    def set_conflict_edges(self, edges):
+        """Sets the instance variable _conflict_edges to the provided array of
+        edges.
+
+
+        Keyword argument:
+
+        edges -- An (m, 2) int32 array of undirected edges (i, j) with
+        i <= j, where i and j are indices into the instance variable _chairs.
+        """
+        assert(isinstance(edges, np.ndarray)), ("edges must be a numpy "
+                                                "array.")
+        assert(edges.ndim == 2 and edges.shape[1] == 2), ("edges must be an "
+                                                          "(m, 2) array.")
+        assert(edges.dtype == np.int32), "edges must be an int32 array."
+        if len(edges) > 0:
+            assert(edges.min() >= 0
+                   and edges.max() < len(self._chairs)), ("edges must index "
+                                                          "into _chairs.")
+        self._conflict_edges = edges
+
+    def get_conflict_edges(self):
+        """Returns the array of edges stored in _conflict_edges."""
+        return self._conflict_edges
+
+    def set_image_plane(self, image_plane):
+        """Sets the instance variable _image_plane to the provided ImagePlane
+        object.
+
+
+        Keyword argument:
+
+        image_plane -- The recognition.ImagePlane holding the room diagram.
+        """
+        assert(isinstance(image_plane, cprec.ImagePlane)), ("image_plane must "
+                                                            "be an ImagePlane "
+                                                            "object.")
+        self._image_plane = image_plane
+
+    def get_image_plane(self):
+        """Returns the ImagePlane object stored in _image_plane."""
+        return self._image_plane
 
     def get_completions(self):
         """Returns the dict containing information on completed input methods
@@ -1028,3 +1228,182 @@ class RoomInfo():
             assert(isinstance(value, bool)), ("values in completions_dict must"
                                               " be True or False booleans.")
         self._completions = completions_dict
+
+    def save_to_json(self, json_save_name):
+        """Saves the room's inputs to the json file json_save_name, so that a
+        later session can load them with load_from_json instead of making
+        them again. The file holds the scale, chair orientations, chair
+        polygons, chairs, completions and, while the Solve Room Status
+        completion is True, the solution and conflict edges, with
+        chairs and polygons referring to their chair orientation and polygon
+        by index. The template of every chair orientation is saved as a png
+        crop beside the file, named after it, which the file refers to by
+        name; keep them in the same folder.
+
+
+        Keyword argument:
+
+        json_save_name -- The filename (str) to save the room to.
+        """
+        stem = os.path.splitext(json_save_name)[0]
+        document = {"schema" : ROOM_SCHEMA,
+                    "version" : ROOM_SCHEMA_VERSION,
+                    "floor" : self.parameters_dict["floor"],
+                    "image_size" : None,
+                    "scale" : None,
+                    "chair_types" : None,
+                    "chair_polys" : None,
+                    "chairs" : None,
+                    "chairs_in_solution" : None,
+                    "conflict_edges" : None,
+                    "completions" : dict(self._completions)}
+        if self._image_plane is not NOT_SET:
+            document["image_size"] = list(self._image_plane.color.shape[1::-1])
+        if self._scale is not NOT_SET:
+            document["scale"] = {"points" : [list(point) for point
+                                             in self._scale.points],
+                                 "scale_length_units" :
+                                 self._scale.scale_length_units,
+                                 "units_to_distance" :
+                                 self._scale.units_to_distance,
+                                 "scale_orientation" :
+                                 self._scale.scale_orientation,
+                                 "pixels_to_distance" :
+                                 self._scale.pixels_to_distance}
+        if self._chair_types is not NOT_SET:
+            document["chair_types"] = []
+            for index, chair_type in enumerate(self._chair_types):
+                template_name = stem + TEMPLATE_SUFFIX % index
+                written = cv2.imwrite(template_name, chair_type.template)
+                assert(written), ("The template of a chair orientation could "
+                                  "not be written.")
+                document["chair_types"].append(
+                    {"points" : [list(point) for point in chair_type.points],
+                     "template" : os.path.basename(template_name)})
+        #Objects refer to each other by their index in the file
+        type_indices = {id(chair_type) : index for index, chair_type
+                        in enumerate(self._chair_types or [])}
+        poly_indices = {id(chair_poly) : index for index, chair_poly
+                        in enumerate(self._chair_polys or [])}
+        if self._chair_polys is not NOT_SET:
+            document["chair_polys"] = [
+                {"chair_type" : type_indices[id(chair_poly.chair_type)],
+                 "points" : [list(point) for point in chair_poly.points]}
+                for chair_poly in self._chair_polys]
+        if self._chairs is not NOT_SET:
+            #Stored by column, which keeps rooms of many chairs compact
+            document["chairs"] = {
+                "chair_poly" : [poly_indices[id(chair.chair_poly)]
+                                for chair in self._chairs],
+                "x" : np.array([chair.coords[0]
+                                for chair in self._chairs]).tolist(),
+                "y" : np.array([chair.coords[1]
+                                for chair in self._chairs]).tolist(),
+                "angle" : np.array([chair.angle
+                                    for chair in self._chairs]).tolist(),
+                "scale" : np.array([chair.scale
+                                    for chair in self._chairs]).tolist()}
+        #The solution and edges are only kept while the room is solved
+        is_solved = self._completions["Solve Room Status"]
+        if self._chairs_in_solution is not NOT_SET and is_solved:
+            chair_indices = {id(chair) : index for index, chair
+                             in enumerate(self._chairs)}
+            document["chairs_in_solution"] = sorted(
+                chair_indices[id(chair)] for chair in self._chairs_in_solution)
+        if self._conflict_edges is not NOT_SET and is_solved:
+            document["conflict_edges"] = self._conflict_edges.tolist()
+        with open(json_save_name, "w") as json_file:
+            json_file.write(json.dumps(document, separators = (",", ":")))
+
+    def load_from_json(self, json_load_name):
+        """Loads a room saved by save_to_json from the json file
+        json_load_name into the RoomInfo instance, replacing its inputs and
+        completions so that the menu resumes where the saved session left
+        off. The room diagram must already be set through set_image_plane and
+        be the same size as the one the room was saved with. The scale is
+        rebuilt from its saved points with this instance's parameters_dict,
+        so the distancing parameters may differ from the saved ones; if that
+        changes pixels_to_distance, the saved solution and conflict edges are
+        not loaded and the room has to be solved again.
+
+
+        Keyword argument:
+
+        json_load_name -- The filename (str) of the saved room.
+        """
+        with open(json_load_name) as json_file:
+            document = json.load(json_file)
+        assert(document.get("schema") == ROOM_SCHEMA), ("json_load_name is "
+                                                        "not a saved room.")
+        assert(document["version"]
+               <= ROOM_SCHEMA_VERSION), ("json_load_name was saved by a newer "
+                                         "version of the tool.")
+        assert(self._image_plane is not NOT_SET), ("The image plane must be "
+                                                   "set before loading a "
+                                                   "room.")
+        img = self._image_plane.color
+        assert(document["image_size"] is None
+               or document["image_size"]
+               == list(img.shape[1::-1])), ("json_load_name was saved with a "
+                                            "room diagram of another size.")
+        directory = os.path.dirname(json_load_name)
+        completions = dict(document["completions"])
+
+        scale = document["scale"]
+        if scale is not None:
+            self.set_new_scale(tuple(scale["points"][0]),
+                               tuple(scale["points"][2]),
+                               self.parameters_dict["units_to_distance"],
+                               self.parameters_dict["scale_orientation"],
+                               self.parameters_dict["scale_length_units"])
+        chair_types = document["chair_types"]
+        if chair_types is not None:
+            list_of_points = []
+            for chair_type in chair_types:
+                list_of_points += [tuple(chair_type["points"][0]),
+                                   tuple(chair_type["points"][2])]
+            self.set_new_chair_types(list_of_points, img)
+            for chair_type, saved in zip(self._chair_types, chair_types):
+                template = cv2.imread(os.path.join(directory,
+                                                   saved["template"]))
+                assert(template is not None), ("The template of a chair "
+                                               "orientation could not be "
+                                               "read.")
+                assert(template.shape
+                       == chair_type.template.shape), ("The template of a "
+                                                       "chair orientation "
+                                                       "does not match its "
+                                                       "points.")
+                chair_type.template = template
+        if document["chair_polys"] is not None:
+            self.set_chair_polys([self.create_new_chair_poly(
+                self._chair_types[chair_poly["chair_type"]],
+                [tuple(point) for point in chair_poly["points"]])
+                                  for chair_poly in document["chair_polys"]])
+        chairs = document["chairs"]
+        if chairs is not None:
+            list_of_chairs = []
+            for index, x, y, angle, chair_scale in zip(chairs["chair_poly"],
+                                                       chairs["x"],
+                                                       chairs["y"],
+                                                       chairs["angle"],
+                                                       chairs["scale"]):
+                chair_poly = self._chair_polys[index]
+                list_of_chairs.append(self.create_new_chair(
+                    chair_poly.chair_type, chair_poly, (x, y), angle,
+                    chair_scale))
+            self.set_chairs(list_of_chairs)
+
+        #A solution is only valid for the distance it was solved with
+        solution_is_valid = (scale is not None
+                             and scale["pixels_to_distance"]
+                             == self._scale.pixels_to_distance)
+        if document["chairs_in_solution"] is not None and solution_is_valid:
+            self.set_chairs_in_sol([self._chairs[index] for index
+                                    in document["chairs_in_solution"]])
+        else:
+            completions["Solve Room Status"] = False
+        if document["conflict_edges"] is not None and solution_is_valid:
+            self.set_conflict_edges(np.array(document["conflict_edges"],
+                                             dtype = np.int32).reshape(-1, 2))
+        self.set_completions(completions)
@@ -1,14 +1,34 @@
 import cv2
 import general as cpg
+import conflict_graph as cpcg
+import recognition as cprec
+import solution_drawer as cpsol
+import solution_exporter as cpexp
 import instructions_drawer as instruct
 import numpy as np
-from skimage.feature import match_template, peak_local_max
-from shapely.geometry import Polygon, Point
-import math, itertools, os, shapely
+import math, time
+from concurrent.futures import ProcessPoolExecutor
 from ortools.linear_solver import pywraplp as OR
-import matplotlib.pyplot as plt
 
 DOT_SIZE = 1
+# Lowest finding threshold chair recognition accepts. Below it nearly every
+# position matches some chair orientation, and the tens of thousands of
+# chairs found take minutes to remove duplicates from and draw.
+MIN_FINDING_THRESHOLD = 0.3
+# Seconds the Threshold slider must rest before the chairs are found again,
+# so that dragging it does not find them at every value passed over
+THRESHOLD_SETTLE_TIME = 0.3
+
+# Exact solver backends by name, as (OR-Tools problem type, whether the
+# backend can use more than one thread, whether it reads the warm start of
+# the "hybrid" solver_mode). The OR-Tools CBC build has no thread support and
+# fails to solve when given a thread count, and ignores SetHint.
+SOLVER_BACKENDS = {"CBC" : (OR.Solver.CBC_MIXED_INTEGER_PROGRAMMING, False,
+                            False),
+                   "SCIP" : (OR.Solver.SCIP_MIXED_INTEGER_PROGRAMMING, False,
+                             True),
+                   "CP-SAT" : (OR.Solver.SAT_INTEGER_PROGRAMMING, True,
+                               True)}
 
 class TempData():
     """A class used to pass information to the click callbacks used by the
@@ -425,6 +445,44 @@ def polygon_creation(non_writable_img, menu_refresh, window_name, room_info):
     room_info.set_chair_polys(list_of_chair_polys)
     menu_refresh.append('r')
 
+def __recognized_chairs(room_info, found, max_overlap, min_distance):
+    """Private helper returning a list of the _Chair objects placed at the
+    centers in found, which holds a (centers, scores) pair, or a (centers,
+    scores, poses) triple from a template bank, for every _ChairType of
+    room_info in order, without the ones suppress_duplicates finds to be the
+    same chair as a better match. Prints how many chairs were found before
+    and after removing duplicates.
+    """
+    list_of_chairs = []
+    scores = []
+    room_info_chair_polys = room_info.get_chair_polys()
+    for chair_type, type_found in zip(room_info.get_chair_types(), found):
+        points, type_scores = type_found[:2]
+        # turned and resized chairs carry the pose they were found in
+        poses = type_found[2] if len(type_found) > 2 else None
+        for poly in room_info_chair_polys:
+            if poly.chair_type == chair_type:
+                type_poly = poly
+        for point in range(len(points)):
+            center_coordinates = (points[point, 1].item(),
+                                  points[point, 0].item())
+            angle, scale = (0, 1) if poses is None else poses[point].tolist()
+            chair = room_info.create_new_chair(chair_type, type_poly,
+                                               center_coordinates, angle,
+                                               scale)
+            list_of_chairs.append(chair)
+        scores.extend(type_scores.tolist())
+    # collapse detections of the same chair across all orientations
+    if max_overlap is not None or min_distance is not None:
+        polygons, middles = cpcg.chair_polygons(list_of_chairs)
+        keep = cprec.suppress_duplicates(
+            polygons, scores,
+            1.0 if max_overlap is None else max_overlap, min_distance)
+        print("Found %d chairs, %d after removing duplicates."
+              % (len(list_of_chairs), len(keep)))
+        list_of_chairs = [list_of_chairs[index] for index in keep.tolist()]
+    return list_of_chairs
+
 def chair_recognition(non_writable_img, menu_refresh, window_name, room_info):
     """chair_recognition handles the chair recognition input section of the
     room solving progress. This function identifies chairs within the room
@@ -432,7 +490,10 @@ def chair_recognition(non_writable_img, menu_refresh, window_name, room_info):
     finding_threshold. Upon completion, this function will draw a version of
     the room diagram with all identified chairs marked in color line_color, and
     will set room_info._chairs to a list containing _Chair instances
-    representing them.
+    representing them. A Threshold slider changes finding_threshold and
+    redraws the identified chairs without matching the chair orientations
+    again once it comes to rest, and the chosen value is kept for the next
+    visit. finding_threshold is kept at or above MIN_FINDING_THRESHOLD.
 
 
     Keyword arguments:
@@ -457,6 +518,14 @@ def chair_recognition(non_writable_img, menu_refresh, window_name, room_info):
     width = room_info.window_info_dict["width"]
     line_color = cpg.RED
     finding_threshold = room_info.parameters_dict["finding_threshold"]
+    recognition_workers = room_info.parameters_dict["recognition_workers"]
+    pyramid_levels = room_info.parameters_dict["recognition_pyramid_levels"]
+    memory_budget = room_info.parameters_dict["recognition_memory_budget"]
+    max_overlap = room_info.parameters_dict["recognition_max_overlap"]
+    min_distance = room_info.parameters_dict["recognition_min_distance"]
+    cache_dir = room_info.parameters_dict["recognition_cache_dir"]
+    angles = room_info.parameters_dict["recognition_angles"]
+    scales = room_info.parameters_dict["recognition_scales"]
 
     if show_instr:
         instruct.chair_recognition_explanation(window_name, screen_height,
@@ -469,35 +538,75 @@ def chair_recognition(non_writable_img, menu_refresh, window_name, room_info):
                        (height - screen_height), __trackbar_change)
     cv2.createTrackbar("Wscroll", window_name, scroll_width,
                        (width - screen_width), __trackbar_change)
-    list_of_chairs = []
-    # initialize empty array
-    x = np.array([])
-    y = np.array([])
-    ctype = np.array([])
 
-    room_info_chair_types = room_info.get_chair_types()
-    room_info_chair_polys = room_info.get_chair_polys()
-    writable_clone = non_writable_img.copy()
-    # extract all types of chairs
-    for chair_type in room_info_chair_types:
-        chair_template = chair_type.template
-        # run matching function (may take a minute or two)
-        result = match_template(non_writable_img, chair_template,
-                                pad_input = True)
-        points = peak_local_max(result, min_distance = 1,
-                                threshold_rel = finding_threshold) # find our peaks (our location points)
-        for poly in room_info_chair_polys:
-            if poly.chair_type == chair_type:
-                type_poly = poly
-        for point in range(len(points)):
-            center_coordinates = (points[point, 1].item(),
-                                  points[point, 0].item())
-            chair = room_info.create_new_chair(chair_type, type_poly,
-                                               center_coordinates)
-            list_of_chairs.append(chair)
-    for chair in list_of_chairs:
-        chair.draw(writable_clone, line_color, 1)
+    image_plane = room_info.get_image_plane()
+    if image_plane is cpg.NOT_SET:
+        image_plane = cprec.ImagePlane(non_writable_img)
+        room_info.set_image_plane(image_plane)
+    chair_templates = [chair_type.template
+                       for chair_type in room_info.get_chair_types()]
+    # match every chair type once, so that moving the threshold slider only
+    # finds the peaks again; the pyramid and tiled searches never keep the
+    # whole correlation and search again instead
+    results = None
+    banks = None
+    if angles is not None or scales is not None:
+        # look for every chair type turned and resized as well
+        banks = [cprec.template_bank(template,
+                                     (0,) if angles is None else angles,
+                                     (1,) if scales is None else scales)
+                 for template in chair_templates]
+        results = cprec.match_template_banks(image_plane, banks,
+                                             workers = recognition_workers)
+    elif pyramid_levels == 0 and memory_budget is None:
+        results = cprec.match_templates(image_plane, chair_templates,
+                                        workers = recognition_workers,
+                                        cache_dir = cache_dir)
+    if finding_threshold < MIN_FINDING_THRESHOLD:
+        print("finding_threshold raised to the minimum of %.2f."
+              % MIN_FINDING_THRESHOLD)
+        finding_threshold = MIN_FINDING_THRESHOLD
+    min_slider_value = int(round(MIN_FINDING_THRESHOLD * 100))
+    slider_value = int(round(finding_threshold * 100))
+    cv2.createTrackbar("Threshold", window_name, slider_value, 100,
+                       __trackbar_change)
+    cv2.setTrackbarMin("Threshold", window_name, min_slider_value)
+    list_of_chairs = None
+    settled = True
+    changed_at = 0
+    closing = False
     while True:
+        value = max(cv2.getTrackbarPos("Threshold", window_name),
+                    min_slider_value)
+        if value != slider_value:
+            slider_value = value
+            changed_at = time.perf_counter()
+            settled = False
+        # only find the chairs again once the slider has come to rest
+        if (not settled
+            and time.perf_counter() - changed_at >= THRESHOLD_SETTLE_TIME):
+            finding_threshold = slider_value / 100
+            list_of_chairs = None
+            settled = True
+        if list_of_chairs is None:
+            # extract all types of chairs, find our peaks (our location points)
+            if banks is not None:
+                found = cprec.find_chairs_in_banks(results, banks,
+                                                   finding_threshold)
+            elif results is None:
+                found = cprec.find_chairs_by_type(
+                    image_plane, chair_templates, finding_threshold,
+                    workers = recognition_workers,
+                    pyramid_levels = pyramid_levels,
+                    memory_budget = memory_budget, return_scores = True)
+            else:
+                found = cprec.find_chairs_in_results(results,
+                                                     finding_threshold)
+            list_of_chairs = __recognized_chairs(room_info, found,
+                                                 max_overlap, min_distance)
+            writable_clone = non_writable_img.copy()
+            for chair in list_of_chairs:
+                chair.draw(writable_clone, line_color, 1)
     #These lines are what allow the scrolling
         scroll_height = cv2.getTrackbarPos("Hscroll", window_name)
         scroll_width = cv2.getTrackbarPos("Wscroll", window_name)
@@ -510,7 +619,13 @@ def chair_recognition(non_writable_img, menu_refresh, window_name, room_info):
         cv2.imshow(window_name, img)
         key = cv2.waitKey(1) & 0xFF
         if key == ord('e'):#close the window if 'e' is pressed
+            closing = True
+            # use the slider's last value even if it has not come to rest
+            changed_at = -math.inf
+        if closing and settled:
             room_info.set_chairs(list_of_chairs)
+            # start from the chosen threshold when coming back
+            room_info.parameters_dict["finding_threshold"] = finding_threshold
             break
     # store output in room_info
     menu_refresh.append('r')
@@ -849,8 +964,8 @@ def input_preview(non_writable_img, menu_refresh, window_name, room_info):
     selected_color -- The color to use (in BGR Tuple form) when drawing the
     selected chair types (chair orientations).
 
-    save_to_json -- Whether or not to save data to json
-    (currently not functioning).
+    save_to_json -- Whether or not to save the room's inputs to
+    json_save_name with RoomInfo.save_to_json when they are confirmed.
 
     json_save_name -- The filename to use when saving the data to json.
     """
@@ -896,22 +1011,133 @@ def input_preview(non_writable_img, menu_refresh, window_name, room_info):
 
         key = cv2.waitKey(1) & 0xFF
         if key == ord('e'):
-            # if save_to_json:
-            #     with open(json_save_name, 'w') as json_file:
-            #         json.dump(room_info, json_file)
+            if save_to_json:
+                #Pressing e confirms the inputs, so mark them confirmed as
+                #the menu will for the saved room to resume at Solve Room
+                completions = room_info.get_completions().copy()
+                completions["Input Confirmation Status"] = True
+                completions["Solve Room Status"] = False
+                room_info.set_completions(completions)
+                room_info.save_to_json(json_save_name)
             break
     menu_refresh.append('r')
 
-def __miset(nodes, edges, solver):
+class MisetResult():
+    """A class used to return the solution found by __miset, the heuristic
+    solver or solve_graphs along with information on how it was found.
+
+
+    Instance Variables:
+
+    in_solution -- A bool numpy array marking, in the order of the nodes given
+    to the solver, the nodes that are in the solution.
+
+    constraint_rows -- The number (int) of constraints in the model.
+
+    branch_nodes -- The number (int) of branch-and-bound nodes the solver
+    explored.
+
+    bound -- An upper bound (int) on the number of nodes in any solution. It
+    is the bound the exact solver proved when it found the solution, which
+    may be tighter than lp_bound, and lp_bound otherwise.
+
+    lp_bound -- The upper bound (int) given by the linear relaxation of the
+    clique formulation, which is found in every solver_mode.
+
+    backend -- The name (str) of the backend in SOLVER_BACKENDS that found the
+    solution, "heuristic", or "mixed" when its components were solved by
+    different ones, such as when some ran out of time.
+
+    solve_time -- The number of seconds (float) spent finding the solution.
+
+
+    Public Methods:
+
+    seats -- Returns the number of nodes in the solution.
+
+    gap -- Returns the relative gap between the solution and bound.
+
+    lp_gap -- Returns the relative gap between the solution and lp_bound.
+
+    is_optimal -- Returns whether the solution is proven to be optimal.
+    """
+
+    def __init__(self, in_solution, constraint_rows, branch_nodes, bound,
+                 backend = "heuristic", solve_time = 0.0, lp_bound = None):
+        """Initializes an instance of the MisetResult class.
+
+
+        Keyword arguments:
+
+        in_solution -- A bool numpy array marking the nodes in the solution.
+
+        constraint_rows -- The number (int) of constraints in the model.
+
+        branch_nodes -- The number (int) of branch-and-bound nodes explored.
+
+        bound -- An upper bound (int) on the number of nodes in any solution.
+
+        backend -- The name (str) of the backend that found the solution.
+
+        solve_time -- The number of seconds (float) spent finding it.
+
+        lp_bound -- The bound (int) given by the linear relaxation, or None
+        if it was not found.
+        """
+        self.in_solution = in_solution
+        self.constraint_rows = constraint_rows
+        self.branch_nodes = branch_nodes
+        self.bound = bound
+        self.backend = backend
+        self.solve_time = solve_time
+        self.lp_bound = lp_bound
+
+    def seats(self):
+        """Returns the number (int) of nodes in the solution."""
+        return int(np.count_nonzero(self.in_solution))
+
+    def gap(self):
+        """Returns the relative gap (float) between the solution and bound,
+        0 when the solution is proven to be optimal.
+        """
+        if self.bound == 0:
+            return 0.0
+        return (self.bound - self.seats()) / self.bound
+
+    def lp_gap(self):
+        """Returns the relative gap (float) between the solution and
+        lp_bound, 0 when they are equal.
+        """
+        if self.lp_bound == 0:
+            return 0.0
+        return (self.lp_bound - self.seats()) / self.lp_bound
+
+    def is_optimal(self):
+        """Returns whether (bool) the solution reaches bound, which proves
+        that no solution uses more nodes.
+        """
+        return self.seats() >= self.bound
+
+def __miset(nodes, cliques, backend, hint = None, time_limit = None,
+            relative_gap = None, threads = 1, progress = False):
     """This is a helper function that solves the graph provided subject to the
-    constraints on the social distancing seat assignment problem.
+    constraints on the social distancing seat assignment problem with the
+    backend named, one of the keys of SOLVER_BACKENDS. cliques holds
+    groups of nodes of which at most one may be used; these are either single
+    edges or the cliques from conflict_graph.clique_cover. hint is an optional
+    bool array marking a known solution, which is given to the solver as a
+    starting point. The solve stops after time_limit seconds or once the
+    solution is within relative_gap of the bound, and with progress the solver
+    prints its incumbents and bounds as it goes. Returns a MisetResult, whose
+    in_solution and bound are None if no solution was found in time.
     """
     NODES = []
     NODES.extend(nodes)    # these four lines are not necessary
-    EDGES = []             # made a copy in case the lists will be modified
-    EDGES.extend(edges)
+    CLIQUES = []           # made a copy in case the lists will be modified
+    CLIQUES.extend(cliques)
 
     # define model
+    solver, threaded, reads_hints = SOLVER_BACKENDS[backend]
     m = OR.Solver('maxIndSet', solver)
 
     # decision variables
@@ -922,17 +1148,296 @@ def __miset(nodes, edges, solver):
     # objective function
     m.Maximize(sum(x[i] for i in NODES))
 
-    # subject to: no more than 1 node from an edge
-    for edge in EDGES:
-        m.Add(x[edge[0]] + x[edge[1]] <= 1)
-
+    # subject to: no more than 1 node from an edge or clique
+    for clique in CLIQUES:
+        m.Add(sum(x[i] for i in clique) <= 1)
+
+    # warm start, which backends such as CBC do not read
+    if hint is not None and reads_hints:
+        m.SetHint([x[i] for i in NODES], [float(value) for value in hint])
+
+    # solver limits
+    parameters = OR.MPSolverParameters()
+    if time_limit is not None:
+        m.SetTimeLimit(max(1, int(time_limit * 1000)))
+    if relative_gap is not None:
+        parameters.SetDoubleParam(OR.MPSolverParameters.RELATIVE_MIP_GAP,
+                                  relative_gap)
+    if threads > 1 and threaded:
+        m.SetNumThreads(threads)
+    if progress:
+        m.EnableOutput()
+
+    start = time.perf_counter()
+    status = m.Solve(parameters)
+    solve_time = time.perf_counter() - start
+    if status not in (OR.Solver.OPTIMAL, OR.Solver.FEASIBLE):
+        return MisetResult(None, m.NumConstraints(), m.nodes(), None,
+                           backend, solve_time)
+
+    in_solution = np.array([x[i].solution_value() > 0.5 for i in NODES],
+                           dtype = bool)
+    bound = math.floor(m.Objective().BestBound() + 1e-6)
+    return MisetResult(in_solution, m.NumConstraints(), m.nodes(), bound,
+                       backend, solve_time)
+
+def __lp_bound(nodes, cliques):
+    """This is a helper function that returns the bound (int) given by the
+    linear relaxation of the model __miset would build for the same nodes and
+    cliques.
+    """
+    m = OR.Solver('maxIndSetRelaxation', OR.Solver.GLOP_LINEAR_PROGRAMMING)
+    x = {}
+    for i in nodes:
+        x[i] = m.NumVar(0, 1, ('%s' % (i)))
+    m.Maximize(sum(x[i] for i in nodes))
+    for clique in cliques:
+        m.Add(sum(x[i] for i in clique) <= 1)
     m.Solve()
+    return math.floor(m.Objective().Value() + 1e-6)
 
-    sol = {}
-    for i in NODES:
-        sol.update( {x[i].name() : x[i].solution_value()} )
+def __is_single_choice(number_of_nodes, edges):
+    """This is a helper function that returns True if the connected component
+    provided is a single seat or a clique of seats without self loops, in which
+    case exactly one of its seats is used.
+    """
+    has_self_loops = bool(np.any(edges[:, 0] == edges[:, 1]))
+    return (not has_self_loops
+            and len(edges) == number_of_nodes * (number_of_nodes - 1) // 2)
+
+def __backend_name(backends):
+    """This is a helper function that returns the name (str) of the backend
+    in the set backends, or "mixed" when it holds more than one.
+    """
+    if len(backends) == 1:
+        return next(iter(backends))
+    return "mixed"
+
+def __solve_component(number_of_nodes, edges, solver_formulation,
+                      solver_mode, solver_backend = "CBC", deadline = None,
+                      relative_gap = None, threads = 1, progress = False):
+    """This is a helper function that solves a single connected component of
+    the conflict graph in the solver_mode given and returns its MisetResult.
+    The linear relaxation bound is found in every solver_mode. The exact
+    solver is given the time left until deadline, a time.time() value, and
+    the heuristic seating is returned when it finds no solution in that time.
+    It is kept at module level so that worker processes can run it.
+    """
+    start = time.perf_counter()
+    cliques = cpcg.clique_cover(number_of_nodes, edges)
+    if solver_formulation == "clique":
+        constraints = cliques
+    else:
+        constraints = edges.tolist()
+    # the clique relaxation bounds far tighter than the edge one
+    bound = __lp_bound(range(number_of_nodes), cliques)
+    solve_time = time.perf_counter() - start
+    time_limit = None
+    if deadline is not None:
+        time_limit = deadline - time.time()
+    if solver_mode == "exact" and (time_limit is None or time_limit > 0):
+        result = __miset(range(number_of_nodes), constraints, solver_backend,
+                         None, time_limit, relative_gap, threads, progress)
+        if result.in_solution is not None:
+            result.solve_time += solve_time
+            result.lp_bound = bound
+            return result
+        solve_time += result.solve_time
+    start = time.perf_counter()
+    in_solution = cpcg.heuristic_independent_set(number_of_nodes, edges)
+    solve_time += time.perf_counter() - start
+    # the exact solver is only needed when the heuristic misses the bound
+    if (solver_mode == "hybrid" and np.count_nonzero(in_solution) < bound
+        and (time_limit is None or time_limit > 0)):
+        result = __miset(range(number_of_nodes), constraints, solver_backend,
+                         in_solution, time_limit, relative_gap, threads,
+                         progress)
+        if result.in_solution is not None:
+            result.solve_time += solve_time
+            result.lp_bound = bound
+            return result
+        solve_time += result.solve_time
+    if solver_mode != "heuristic" and np.count_nonzero(in_solution) < bound:
+        print("No solution found for a component of %d seats within the "
+              "time limit, using the heuristic seating." % number_of_nodes)
+    return MisetResult(in_solution, len(constraints), 0, bound, "heuristic",
+                       solve_time, bound)
+
+def solve_graphs(graphs, solver_formulation = "edge", solver_workers = 1,
+                 graph_reductions = True, solver_mode = "exact",
+                 solver_time_limit = None, solver_gap = None,
+                 solver_threads = 1, solver_progress = False,
+                 solver_backend = "CBC"):
+    """Solves the maximum independent set problem on every graph provided and
+    returns a list holding a MisetResult per graph, whose in_solution marks the
+    nodes in its solution and whose bound is an upper bound on the size of any
+    solution. With graph_reductions, each graph is first shrunk to its kernel
+    by conflict_graph.reduce_graph. Each graph is split into its connected
+    components, single seats and cliques are solved directly and the remaining
+    components are solved independently in solver_mode. With solver_workers
+    greater than 1 those components are dispatched to a pool of worker
+    processes, largest first, and the results are gathered back in a fixed
+    order so that the solution does not depend on which worker finishes
+    first.
+
+
+    Keyword arguments:
+
+    graphs -- A list of (number_of_nodes, edges) pairs, where edges is an
+    (m, 2) array of undirected edges as returned by
+    conflict_graph.undirected_edges. Rows (i, i) mark nodes that can not be
+    used.
+
+    solver_formulation -- Either "edge" or "clique" (str), the constraints
+    to give the solver.
+
+    solver_workers -- The number (int) of worker processes to solve
+    components with. 1 solves them in the current process.
+
+    graph_reductions -- Whether (bool) to apply the exact reduction rules of
+    conflict_graph.reduce_graph before solving.
 
-    return(sol)
+    solver_mode -- One of "exact", "heuristic" or "hybrid" (str). "exact"
+    solves every component to optimality with __miset. "heuristic" uses
+    conflict_graph.heuristic_independent_set and bounds it with the linear
+    relaxation. "hybrid" only runs __miset on components the heuristic
+    solution does not reach that bound for, and gives it the heuristic
+    solution as a warm start, which only the backends of SOLVER_BACKENDS
+    that read hints, SCIP and CP-SAT, use. Every mode finds the linear
+    relaxation bound, in each MisetResult's lp_bound, while bound is the
+    tighter one the exact solver proves in "exact" and "hybrid".
+
+    solver_time_limit -- The number of seconds (float) the exact solver may
+    run for over all components, or None for no limit. Components that run
+    out of time keep the best solution found, which may not be optimal, or the
+    heuristic solution if none was found.
+
+    solver_gap -- The relative gap (float) between the solution and the bound
+    at which the exact solver may stop, or None for the solver's default.
+
+    solver_threads -- The number (int) of threads each exact solve may use,
+    for backends that support more than one.
+
+    solver_progress -- Whether (bool) the exact solver prints its incumbents
+    and bounds while it runs.
+
+    solver_backend -- The name (str) of the exact solver to use, one of the
+    keys of SOLVER_BACKENDS.
+    """
+    assert(solver_backend in SOLVER_BACKENDS), ("solver_backend must be one "
+                                                "of " + ", ".join(
+                                                    SOLVER_BACKENDS) + ".")
+    assert(solver_mode in ("exact", "heuristic",
+                           "hybrid")), ("solver_mode must be \"exact\", "
+                                        "\"heuristic\" or \"hybrid\".")
+    assert(solver_formulation in ("edge",
+                                  "clique")), ("solver_formulation must be "
+                                               "\"edge\" or \"clique\".")
+    if solver_mode == "hybrid" and not SOLVER_BACKENDS[solver_backend][2]:
+        print("The %s backend does not read the heuristic warm start, so "
+              "hybrid mode only skips the exact solver where the heuristic "
+              "meets the bound. Use SCIP or CP-SAT for the warm start."
+              % solver_backend)
+    deadline = None
+    if solver_time_limit is not None:
+        deadline = time.time() + solver_time_limit
+    settings = (solver_mode, solver_backend, deadline, solver_gap,
+                solver_threads, solver_progress)
+    solutions = []
+    reductions = []
+    tasks = []
+    closed_form = 0
+    for graph, (number_of_nodes, edges) in enumerate(graphs):
+        edges = np.asarray(edges, dtype = np.int32).reshape(-1, 2)
+        if graph_reductions:
+            reduction = cpcg.reduce_graph(number_of_nodes, edges)
+            reductions.append(reduction)
+            number_of_nodes = len(reduction.kernel_nodes)
+            edges = reduction.kernel_edges
+        else:
+            reductions.append(None)
+        in_solution = np.zeros(number_of_nodes, dtype = bool)
+        for nodes, component_edges in cpcg.split_components(number_of_nodes,
+                                                             edges):
+            if __is_single_choice(len(nodes), component_edges):
+                closed_form += 1
+                in_solution[nodes[0]] = True
+            else:
+                tasks.append((graph, nodes, component_edges))
+        solutions.append(MisetResult(in_solution, 0, 0, 0,
+                                     "heuristic" if solver_mode == "heuristic"
+                                     else solver_backend, lp_bound = 0))
+
+    results = [None] * len(tasks)
+    if solver_workers > 1 and len(tasks) > 1:
+        order = sorted(range(len(tasks)),
+                       key = lambda task: -len(tasks[task][2]))
+        with ProcessPoolExecutor(max_workers = min(solver_workers,
+                                                   len(tasks))) as pool:
+            futures = {}
+            for task in order:
+                graph, nodes, component_edges = tasks[task]
+                futures[task] = pool.submit(__solve_component, len(nodes),
+                                            component_edges,
+                                            solver_formulation, *settings)
+            for task in range(len(tasks)):
+                results[task] = futures[task].result()
+    else:
+        for task in range(len(tasks)):
+            graph, nodes, component_edges = tasks[task]
+            results[task] = __solve_component(len(nodes), component_edges,
+                                              solver_formulation, *settings)
+
+    #Bounds are kept as the slack over the seats found, which the exact
+    #reductions and directly solved components do not add to
+    backends = [set() for solution in solutions]
+    for (graph, nodes, component_edges), result in zip(tasks, results):
+        solution = solutions[graph]
+        backends[graph].add(result.backend)
+        solution.in_solution[nodes] = result.in_solution
+        solution.constraint_rows += result.constraint_rows
+        solution.branch_nodes += result.branch_nodes
+        solution.bound += result.bound - result.seats()
+        solution.lp_bound += result.lp_bound - result.seats()
+        solution.solve_time += result.solve_time
+    #Name the backend that actually solved the components, which is the
+    #heuristic for those the exact solver found nothing for in time
+    for solution, graph_backends in zip(solutions, backends):
+        if graph_backends:
+            solution.backend = __backend_name(graph_backends)
+    if graph_reductions:
+        original_nodes = sum(r.number_of_nodes for r in reductions)
+        original_edges = sum(r.number_of_edges for r in reductions)
+        kernel_nodes = sum(len(r.kernel_nodes) for r in reductions)
+        kernel_edges = sum(len(r.kernel_edges) for r in reductions)
+        print("Graph reductions eliminated %d of %d seats and %d of %d edges."
+              % (original_nodes - kernel_nodes, original_nodes,
+                 original_edges - kernel_edges, original_edges))
+        for reduction, solution in zip(reductions, solutions):
+            solution.in_solution = reduction.expand(solution.in_solution)
+    for solution in solutions:
+        solution.bound += solution.seats()
+        solution.lp_bound += solution.seats()
+
+    seats = sum(solution.seats() for solution in solutions)
+    bound = sum(solution.bound for solution in solutions)
+    lp_bound = sum(solution.lp_bound for solution in solutions)
+    print("%d connected components, %d of them solved directly as single "
+          "seats or cliques." % (closed_form + len(tasks), closed_form))
+    print("Solved %d constraint rows (%s formulation, %s mode) in %d "
+          "branch-and-bound nodes using %d worker(s), %.2f s in %s."
+          % (sum(solution.constraint_rows for solution in solutions),
+             solver_formulation, solver_mode,
+             sum(solution.branch_nodes for solution in solutions),
+             max(1, min(solver_workers, len(tasks))),
+             sum(solution.solve_time for solution in solutions),
+             __backend_name({solution.backend for solution in solutions})
+             if solutions else solver_backend))
+    print("%d seats used, bound %d, gap %.1f%%%s, LP bound %d, LP gap %.1f%%."
+          % (seats, bound, 100.0 * (bound - seats) / max(bound, 1),
+             "" if seats >= bound else ", not proven optimal", lp_bound,
+             100.0 * (lp_bound - seats) / max(lp_bound, 1)))
+    return solutions
 
 def solve_room(non_writable_img, menu_refresh, window_name, room_info):
     """solve_room converts the input into a graph representation of the room
@@ -959,107 +1464,105 @@ def solve_room(non_writable_img, menu_refresh, window_name, room_info):
     room_info._chair_polys. Also requires room_info._chairs to already have
     been set to a list of _Chair instances.
 
-    solution_dpi -- The dpi (int) to use when writing the solution diagram.
+    solution_dpi -- The dpi (int) to use when writing the solution diagram
+    with matplotlib.
 
     solution_name -- The filename (string) to use when writing the solution
     diagram.
+
+    solution_renderer -- One of solution_drawer.SOLUTION_RENDERERS (str).
+    "opencv" draws the solution diagram at the room diagram's own resolution
+    in a fraction of a second, "matplotlib" plots it at solution_dpi, and
+    "svg" and "pdf" write it as shapes that print at any size.
+
+    solution_exports -- The formats (list of str) from
+    solution_exporter.SOLUTION_EXPORT_FORMATS to also save the seats, their
+    conflicts and the scale in under solution_name, or None.
+
+    solver_formulation -- Either "edge" or "clique" (str). "edge" gives the
+    solver one constraint per pair of conflicting seats, while "clique" covers
+    the conflict graph with cliques and gives it one constraint per clique.
+
+    solver_workers -- The number (int) of worker processes used to solve the
+    independent components of the conflict graph.
+
+    graph_reductions -- Whether (bool) to shrink the conflict graph with exact
+    reduction rules before solving it.
+
+    solver_mode -- One of "exact", "heuristic" or "hybrid" (str). "exact"
+    proves the seating is optimal, "heuristic" finds a good seating in
+    milliseconds without proof and "hybrid" only runs the exact solver where
+    the heuristic seating misses the linear relaxation bound, starting it
+    from that seating with the SCIP and CP-SAT backends; CBC ignores the
+    warm start. Every mode prints the gap to the linear relaxation bound.
+
+    solver_time_limit -- The number of seconds (float) the solver may run for,
+    or None for no limit. A seating found when time runs out is drawn and
+    labelled as not proven optimal.
+
+    solver_gap -- The relative gap (float) to the bound at which the solver
+    may stop, or None for the solver's default.
+
+    solver_threads -- The number (int) of threads the solver may use.
+
+    solver_progress -- Whether (bool) to print the solver's progress.
+
+    solver_backend -- The name (str) of the exact solver, one of the keys of
+    SOLVER_BACKENDS.
     """
     show_instr = room_info.parameters_dict["show_instructions"]
     screen_height = room_info.parameters_dict["screen_height"]
     screen_width = room_info.parameters_dict["screen_width"]
     solution_dpi = room_info.parameters_dict["solution_dpi"]
     solution_name = room_info.parameters_dict["solution_name"]
+    solution_renderer = room_info.parameters_dict["solution_renderer"]
+    solution_exports = room_info.parameters_dict["solution_exports"]
+    solver_formulation = room_info.parameters_dict["solver_formulation"]
+    solver_workers = room_info.parameters_dict["solver_workers"]
+    graph_reductions = room_info.parameters_dict["graph_reductions"]
+    solver_mode = room_info.parameters_dict["solver_mode"]
+    solver_time_limit = room_info.parameters_dict["solver_time_limit"]
+    solver_gap = room_info.parameters_dict["solver_gap"]
+    solver_threads = room_info.parameters_dict["solver_threads"]
+    solver_progress = room_info.parameters_dict["solver_progress"]
+    solver_backend = room_info.parameters_dict["solver_backend"]
 
     if show_instr:
          instruct.solve_room_explanation(window_name, screen_height,
                                          screen_width)
-    coords = []
-    polygons = []
-    middles = []
-
     room_info_chairs = room_info.get_chairs()
-    for chair in room_info_chairs:
-        coords.append(Point(chair.coords))
-        chair_poly = chair.chair_poly
-        polygon = Polygon(np.array(chair_poly.points))
-        polygon = shapely.affinity.translate(polygon,
-                                             xoff = chair.coords[0],
-                                             yoff = chair.coords[1])
-        polygon = shapely.affinity.translate(polygon,
-                                             xoff = chair_poly.offsets[0],
-                                             yoff = chair_poly.offsets[1])
-        polygons.append(polygon)
-        middles.append(polygon.centroid)
-    # set axis tick size
-    plt.rc('xtick', labelsize = 4)
-    plt.rc('ytick', labelsize = 4)
-    fig, ax = plt.subplots(dpi = solution_dpi)
-    plt.axis('off')
-
-    # set axis line size
-    for axis in ['top', 'bottom', 'left', 'right']:
-        ax.spines[axis].set_linewidth(0.5)
-
-    # plot points
-    xs = []
-    ys = []
-    for chair in middles:
-        xs.append(chair.x)
-        ys.append(chair.y)
+    polygons, middles = cpcg.chair_polygons(room_info_chairs)
     # generate edges from distances
-    edgelist = list()      # overall list of (directed) edges
-
-    for i in range(len(coords)):
-        for j in range(len(coords)):
-            if (i != j):
-                dist = polygons[j].distance(middles[i])
-                if (dist <= room_info.get_scale().pixels_to_distance):
-                    edgelist.append((i, j)) # add edge if seat is too close
-
-
-    nodes = []
-    for i in range(len(coords)):
-        nodes.append(i)
+    directed_edges = cpcg.build_conflict_edges(polygons, middles,
+                                               room_info.get_scale()
+                                               .pixels_to_distance)
+    edges = cpcg.undirected_edges(directed_edges)
+    print("%d directed conflicts reduced to %d constraint rows."
+          % (len(directed_edges), len(edges)))
+    room_info.set_conflict_edges(edges)
 
     # solve problem
-    sol = __miset(nodes, edgelist, OR.Solver.CBC_MIXED_INTEGER_PROGRAMMING)
-
-    in_solution = list(sol.values())
-    total_chairs = 0
-    chairs_in_solution = []
-    for i in in_solution:
-        if i == 1.0:
-            total_chairs += 1
-
-    for i in range(len(in_solution)):
-        if in_solution[i] == 0:
-            xz, yz = polygons[i].exterior.xy
-            ax.plot(xz, yz, color = 'blue', alpha = 1, linewidth = 0.2,
-                    solid_capstyle = 'round', zorder = 2)
-            ax.fill(xz, yz, alpha = 0.6, fc = 'lightblue', ec = 'darkblue',
-                    linewidth = 0.15, zorder = 2)
-        else:
-            xz, yz = polygons[i].exterior.xy
-            ax.plot(xz, yz, color = 'orange', alpha = 1, linewidth = 0.2,
-                    solid_capstyle = 'round', zorder = 3)
-            ax.fill(xz, yz, alpha = 0.6, fc = 'orange', ec = 'darkred',
-                    linewidth = 0.15, zorder = 3)
-            draw_circle = plt.Circle((middles[i].x, middles[i].y),
-                                     room_info.get_scale().pixels_to_distance,
-                                     fill = False, ec = 'darkblue', ls = '--',
-                                     lw = 0.2, zorder = 4)
-            ax.add_artist(draw_circle)
-            chairs_in_solution.append(room_info_chairs[i])
-
-    plt.text(10, 10, str(int(total_chairs)) + " seats",
-             fontsize = 6, color = 'red',
-             horizontalalignment = 'left',
-             verticalalignment = 'top')
+    solution = solve_graphs([(len(room_info_chairs), edges)],
+                            solver_formulation, solver_workers,
+                            graph_reductions, solver_mode, solver_time_limit,
+                            solver_gap, solver_threads, solver_progress,
+                            solver_backend)[0]
+    in_solution = solution.in_solution
+    total_chairs = int(np.count_nonzero(in_solution))
+    chairs_in_solution = [room_info_chairs[i]
+                          for i in np.flatnonzero(in_solution)]
+
+    seats_label = str(int(total_chairs)) + " seats"
+    if not solution.is_optimal():
+        seats_label += (" (not proven optimal, at most "
+                        + str(int(solution.bound)) + ")")
     room_info.set_chairs_in_sol(chairs_in_solution)
     print("generating image")
-    ax.imshow(non_writable_img)
-    plt.savefig(solution_name + ".jpg", orientation = 'portrait',
-                format = 'jpg',
-                dpi = solution_dpi)
+    cpsol.save_solution(non_writable_img, polygons, middles, in_solution,
+                        room_info.get_scale().pixels_to_distance,
+                        seats_label, solution_name, solution_dpi,
+                        solution_renderer)
+    if solution_exports:
+        cpexp.export_solution(room_info, solution_name, solution_exports)
     menu_refresh.append('r')
     return
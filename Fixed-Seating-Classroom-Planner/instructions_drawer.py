@@ -137,12 +137,12 @@ CHAIR_RECOGNITION_INSTRUCT6_TEXT = ("Remember, the results of Chair "
                                     "following steps, so it is not necessary "
                                     "to have perfect results.")
 CHAIR_RECOGNITION_INSTRUCT7_TEXT = ("If a substantial amount of chairs are "
-                                    "being placed erroneously, restart the "
-                                    "tool with a higher finding_threshold.")
+                                    "being placed erroneously, drag the "
+                                    "Threshold slider to a higher value.")
 CHAIR_RECOGNITION_INSTRUCT8_TEXT = ("Similarly, if there are way too many "
                                     "chairs that failed to be recognized, "
-                                    "restrt the tool with a lower "
-                                    "finding_threshold.")
+                                    "drag the Threshold slider to a lower "
+                                    "value.")
 CHAIR_RECOGNITION_INSTRUCT9_TEXT = "Press 'e' to proceed to chair recognition."
 
 CHAIR_ADDITION_TITLE_TEXT = "Chair Addition"
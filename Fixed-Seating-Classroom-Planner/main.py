@@ -1,8 +1,7 @@
 import cv2
-import json
 import menu_drawer as cpmenu
 import general as cpg
-from shapely.geometry import Polygon, Point
+import recognition as cprec
 
 WINDOW_NAME = "Seating Planner"
 DOT_SIZE = 1
@@ -44,7 +43,21 @@ def launch_classroom_planner(screen_height, screen_width, room_type, floor,
                              json_save_name, scale_units_length,
                              units_to_distance, scale_orientation, chair_scale,
                              solution_name, sol_dpi, finding_threshold,
-                             show_instr):
+                             show_instr, solver_formulation = "edge",
+                             solver_workers = 1, graph_reductions = True,
+                             solver_mode = "exact", solver_time_limit = None,
+                             solver_gap = None, solver_threads = 1,
+                             solver_progress = False, solver_backend = "CBC",
+                             recognition_workers = None,
+                             recognition_pyramid_levels = 0,
+                             recognition_memory_budget = None,
+                             recognition_max_overlap = 0.5,
+                             recognition_min_distance = None,
+                             recognition_cache_dir = None,
+                             recognition_angles = None,
+                             recognition_scales = None,
+                             solution_renderer = "opencv",
+                             solution_exports = None):
     """The launching function for the classroom planning tool. Launches the
     classroom planner configured around the keyword arguments provided.
 
@@ -61,8 +74,18 @@ def launch_classroom_planner(screen_height, screen_width, room_type, floor,
 
     floor -- The name of the image file containing the room diagram.
 
-    save_to_json -- Whether or not to save data to json (currently not
-    functional).
+    json_load_name -- The filename of the json to load the room's inputs
+    from when load_from_json is True.
+
+    load_from_json -- Whether or not to load the room's inputs, saved by an
+    earlier session with save_to_json, from json_load_name. The menu then
+    resumes where that session left off, usually at Solve Room, without
+    redoing the scale, chair orientations, polygons or chair recognition.
+    The scale uses this session's distancing parameters.
+
+    save_to_json -- Whether or not to save the room's inputs to
+    json_save_name when they are confirmed in the input preview. The
+    template of every chair orientation is saved as a png beside it.
 
     json_save_name -- The filename to use when saving the data to json.
 
@@ -81,23 +104,124 @@ def launch_classroom_planner(screen_height, screen_width, room_type, floor,
     solution_name -- The filename (string) to use when writing the solution
     diagram.
 
-    sol_dpi -- The dpi (int) to use when writing the solution diagram.
+    sol_dpi -- The dpi (int) to use when writing the solution diagram with
+    the matplotlib solution_renderer.
 
     finding_threshold -- The finding_threshold for the recognition process.
-    A float with a minimum of 0 and maximum of 1. Higher values will result in
+    A float with a minimum of 0.3 and maximum of 1. Higher values will result in
     less chairs  being placed. At 1, no chairs will be identified, but
     finding_threshold that are too low will result in erroneous chair
     placements.
 
     show_instr -- A bool representing whether or not to show instructions.
+
+    solver_formulation -- How to write the seat conflicts as solver
+    constraints. Either "edge" for one constraint per conflicting pair of
+    seats or "clique" for one constraint per clique covering them. "clique"
+    usually solves large, dense rooms much faster.
+
+    solver_workers -- The number (int) of worker processes to solve
+    independent groups of seats with, such as seating banks separated by wide
+    aisles. 1 solves them one after another in the tool's own process.
+
+    graph_reductions -- Whether (bool) to shrink the conflict graph with exact
+    reduction rules, such as settling seats with a single conflicting
+    neighbour, before handing it to the solver. Does not change the number of
+    seats in the solution.
+
+    solver_mode -- How to solve for the seating. "exact" proves the seating
+    uses as many seats as possible, "heuristic" finds a good seating in
+    milliseconds for quick what-if runs without that proof, and "hybrid"
+    only runs the exact solver where the heuristic seating falls short of
+    the linear relaxation bound, starting it from that seating with the SCIP
+    and CP-SAT solver_backend; CBC ignores that warm start. Every mode prints
+    the number of seats used and its gap to the linear relaxation bound, and
+    "exact" and "hybrid" also print the tighter bound the solver proved.
+
+    solver_time_limit -- The number of seconds (int or float) the solver may
+    run for, or None for no limit. When time runs out, the best seating found
+    is still drawn, labelled as not proven optimal.
+
+    solver_gap -- The relative gap (float) between the seating and its upper
+    bound at which the solver may stop, e.g. 0.01 for 1%. None uses the
+    solver's default.
+
+    solver_threads -- The number (int) of threads the solver may use. Only
+    the CP-SAT backend uses more than one.
+
+    solver_progress -- Whether (bool) to print the solver's best seating and
+    bound as it runs.
+
+    solver_backend -- The exact solver to use, one of "CBC", "SCIP" or
+    "CP-SAT" (str). CP-SAT is often much faster on large rooms and can use
+    several threads.
+
+    recognition_workers -- The number (int) of threads used to search for the
+    chair orientations at the same time. None uses one per CPU core.
+
+    recognition_pyramid_levels -- The number (int) of times to halve the room
+    diagram and chair orientations for a coarse search that picks out where to
+    look at full size. 0 looks at every position of the room diagram. Can
+    speed up recognition on large diagrams with few chairs, but may rarely
+    miss a chair.
+
+    recognition_memory_budget -- The number of megabytes (int or float) each
+    tile may use when searching the room diagram for chairs tile by tile, or
+    None to search the whole diagram at once. Tiles keep the memory used by
+    recognition the same however large the diagram is and find the same
+    chairs. Cannot be combined with recognition_pyramid_levels.
+
+    recognition_max_overlap -- When the polygons of two recognized chairs,
+    of the same or of different orientations, overlap by more than this
+    fraction (float between 0 and 1) of their combined area, only the better
+    match is kept. This stops one chair being seated twice. None keeps every
+    chair found.
+
+    recognition_min_distance -- When the centers of two recognized chairs
+    are closer than this many pixels (int or float), only the better match is
+    kept. None does not compare centers.
+
+    recognition_cache_dir -- The directory (str) to save the correlation of
+    the room diagram with every chair orientation in, or None to not save it.
+    Running chair recognition again on the same diagram and orientations,
+    such as with another finding_threshold, then only finds the chairs in the
+    saved results, which takes a fraction of a second. The directory may be
+    deleted at any time.
+
+    recognition_angles -- The angles (list of ints or floats, in degrees) to
+    also look for every chair orientation turned by, such as range(0, 360,
+    15) for chairs in angled seating sections. Each chair found is turned by
+    the angle that matched it best. None only looks for the chair
+    orientations as they were selected. Turned chairs are matched with FFTs
+    and do not use the pyramid, tiled or cached searches.
+
+    recognition_scales -- The factors (list of ints or floats) to also look
+    for every chair orientation resized by, such as [0.9, 1, 1.1]. None only
+    looks for them at their selected size.
+
+    solution_renderer -- How to draw the solution diagram, "opencv",
+    "matplotlib", "svg" or "pdf" (str). "opencv" draws it straight onto the
+    room diagram at its own resolution, in a fraction of a second even for
+    large rooms. "matplotlib" plots the seats on a figure saved at sol_dpi,
+    which takes several seconds at high dpi, and is the only use of
+    matplotlib. "svg" and "pdf" write the seats as shapes over the room
+    diagram, for printing at any size; the svg also saves the room diagram
+    as a png beside it, which must be kept in the same folder.
+
+    solution_exports -- The formats (list of str) to also save the solved
+    room in for other tools, any of "json", "csv" and "parquet", or None.
+    Each holds every seat's position, chair orientation, polygon and whether
+    it is used, the pairs of seats too close to each other and the scale.
+    "parquet" needs pyarrow.
     """
     #TODO: assert preconditions
-    floor_img = cv2.imread(floor, cv2.IMREAD_UNCHANGED)
-
-
+    floor_img = cv2.imread(floor)
+    assert(floor_img is not None), "floor could not be read as an image."
+    #Load the room diagram once; every stage reads it from the image plane
+    image_plane = cprec.ImagePlane(floor_img)
 
     (height, window_height,
-     width, window_width) = __set_window_size_properties(floor_img,
+     width, window_width) = __set_window_size_properties(image_plane.color,
                                                          screen_height,
                                                          screen_width)
 
@@ -116,7 +240,29 @@ def launch_classroom_planner(screen_height, screen_width, room_type, floor,
                        "solution_name" : solution_name,
                        "solution_dpi" : sol_dpi,
                        "finding_threshold" : finding_threshold,
-                       "show_instructions" : show_instr}
+                       "show_instructions" : show_instr,
+                       "solver_formulation" : solver_formulation,
+                       "solver_workers" : solver_workers,
+                       "graph_reductions" : graph_reductions,
+                       "solver_mode" : solver_mode,
+                       "solver_time_limit" : solver_time_limit,
+                       "solver_gap" : solver_gap,
+                       "solver_threads" : solver_threads,
+                       "solver_progress" : solver_progress,
+                       "solver_backend" : solver_backend,
+                       "recognition_workers" : recognition_workers,
+                       "recognition_pyramid_levels" :
+                       recognition_pyramid_levels,
+                       "recognition_memory_budget" :
+                       recognition_memory_budget,
+                       "recognition_max_overlap" : recognition_max_overlap,
+                       "recognition_min_distance" :
+                       recognition_min_distance,
+                       "recognition_cache_dir" : recognition_cache_dir,
+                       "recognition_angles" : recognition_angles,
+                       "recognition_scales" : recognition_scales,
+                       "solution_renderer" : solution_renderer,
+                       "solution_exports" : solution_exports}
 
     window_info_dict = {"height" : height,
                         "width" : width,
@@ -124,7 +270,10 @@ def launch_classroom_planner(screen_height, screen_width, room_type, floor,
                         "window_width" : window_width}
 
     room_info = cpg.RoomInfo(parameters_dict, window_info_dict)
-    non_writable_img = cv2.imread(floor)
+    room_info.set_image_plane(image_plane)
+    if load_from_json:
+        room_info.load_from_json(json_load_name)
+    non_writable_img = image_plane.color
 
     cv2.namedWindow(WINDOW_NAME, cv2.WINDOW_AUTOSIZE)
     cv2.resizeWindow(WINDOW_NAME, window_width, window_height)
@@ -0,0 +1,1117 @@
+import cv2
+import hashlib
+import numpy as np
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from scipy import fft as scipy_fft
+from scipy.signal import fftconvolve
+from skimage.feature import match_template as skimage_match_template
+from shapely.strtree import STRtree
+import shapely
+
+MATCHING_METHODS = ("opencv", "fft", "skimage")
+# Coarse peaks are kept down to this fraction of finding_threshold, since
+# matches score lower on blurred, downsampled images
+COARSE_THRESHOLD_FACTOR = 0.7
+# Downsampling stops before a template side gets shorter than this
+MIN_PYRAMID_TEMPLATE = 8
+# Side of the square blocks of the full resolution result that the coarse to
+# fine search computes around its candidates
+REFINE_BLOCK_SIZE = 64
+# Bumped whenever cached correlation maps would no longer match the ones
+# match_template computes
+CACHE_VERSION = 1
+# Rough number of bytes the tiled search holds per pixel of a tile window:
+# the grayscale window, the correlation, its maximum filter and
+# cv2.matchTemplate's own buffers
+TILE_BYTES_PER_PIXEL = 32
+
+def to_grayscale(img):
+    """Returns a float32 grayscale version of the cv2 image img, which may
+    already be grayscale or have 3 (BGR) or 4 (BGRA) channels. A float32
+    grayscale img is returned as it is.
+
+
+    Keyword argument:
+
+    img -- A cv2 image or an ImagePlane, whose cached grayscale version is
+    returned.
+    """
+    if isinstance(img, ImagePlane):
+        return img.get_gray()
+    if img.ndim == 3 and img.shape[2] == 4:
+        img = cv2.cvtColor(img, cv2.COLOR_BGRA2GRAY)
+    elif img.ndim == 3 and img.shape[2] == 3:
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    elif img.ndim == 3:
+        img = img[:, :, 0]
+    return img.astype(np.float32, copy = False)
+
+def integral_window_variances(sums, square_sums, template_shape):
+    """Returns a float64 array the size of the grayscale image that sums and
+    square_sums are the integral images of holding, for every pixel, the sum
+    of the squared differences from their mean of the values under a window
+    of template_shape centered on it as in match_template, with areas
+    outside the image counting as black. This is the image's part of the
+    normalization of the cross correlation. Each window takes four lookups
+    into each integral image, whatever its size, and as grayscale values are
+    whole numbers the sums are exact.
+
+
+    Keyword arguments:
+
+    sums -- The float64 integral image of the grayscale image, as
+    cv2.integral2 gives it, one row and one column larger than the image.
+
+    square_sums -- The float64 integral image of its square.
+
+    template_shape -- The (height, width) of the template.
+    """
+    height = sums.shape[0] - 1
+    width = sums.shape[1] - 1
+    template_height, template_width = template_shape[:2]
+    #Repeating the edges of an integral image gives the integral image of
+    #the image padded with black, where every window is a plain slice
+    padding = (template_height // 2, template_height - template_height // 2,
+               template_width // 2, template_width - template_width // 2)
+
+    def window_sum(integral):
+        integral = cv2.copyMakeBorder(integral, *padding,
+                                      cv2.BORDER_REPLICATE)
+        total = integral[template_height : template_height + height,
+                         template_width : template_width + width].copy()
+        total -= integral[: height, template_width : template_width + width]
+        total -= integral[template_height : template_height + height, : width]
+        total += integral[: height, : width]
+        return total
+
+    sum_of_values = window_sum(sums)
+    sum_of_values *= sum_of_values
+    sum_of_values /= template_height * template_width
+    variances = window_sum(square_sums)
+    variances -= sum_of_values
+    return np.maximum(variances, 0, out = variances)
+
+
+class ImagePlane():
+    """ImagePlane holds the room diagram, loaded once at launch, together
+    with the versions of it that the input stages and chair recognition
+    derive from it. Each version is computed the first time it is asked for
+    and then kept, so that the diagram is never converted again however many
+    times the chairs are recognized. All arrays are read only, as one
+    ImagePlane is shared by every input stage and by the threads matching
+    chair orientations.
+
+
+    Instance variables:
+
+    color -- The read only cv2 (BGR) image of the room diagram.
+
+    _gray -- The float32 grayscale version of color, or None until first
+    asked for.
+
+    _integrals -- A (sums, square_sums) pair of the float64 integral images
+    of _gray and of its square, or None until first asked for.
+
+    _pyramid -- A dict mapping a number (int) of cv2.pyrDown halvings to
+    _gray halved that many times.
+
+    _window_variances -- A dict mapping a template (height, width) to the
+    window variances integral_window_variances gives for it.
+
+    _lock -- The threading.RLock stopping two threads from computing the same
+    version at once.
+
+
+    Public Methods:
+
+    get_gray -- Returns the grayscale version of the room diagram.
+
+    get_integrals -- Returns the integral images of the grayscale version and
+    of its square.
+
+    get_pyramid_level -- Returns the grayscale version halved a given number
+    of times.
+
+    get_window_variances -- Returns the variances of the grayscale version
+    under windows of a given template size.
+    """
+
+    def __init__(self, img):
+        """Initializes an instance of the ImagePlane class holding img.
+
+
+        Keyword argument:
+
+        img -- The cv2 image of the room diagram. It is not copied, but the
+        ImagePlane only ever reads it through a read only view.
+        """
+        assert(isinstance(img, np.ndarray)), ("img must be a cv2 image, such "
+                                              "as returned by cv2.imread.")
+        self.color = img.view()
+        self.color.flags.writeable = False
+        self._gray = None
+        self._integrals = None
+        self._pyramid = {}
+        self._window_variances = {}
+        self._lock = threading.RLock()
+
+    def get_gray(self):
+        """Returns the read only float32 grayscale version of the room
+        diagram, as to_grayscale gives it.
+        """
+        with self._lock:
+            if self._gray is None:
+                gray = to_grayscale(self.color)
+                gray.flags.writeable = False
+                self._gray = gray
+            return self._gray
+
+    def get_integrals(self):
+        """Returns a (sums, square_sums) pair of read only float64 arrays one
+        row and one column larger than the room diagram, holding the sum of
+        the grayscale version, and of its square, over every rectangle from
+        the top left corner, as cv2.integral2 gives them. The sum over any
+        window then takes four lookups, whatever the size of the window.
+        """
+        with self._lock:
+            if self._integrals is None:
+                sums, square_sums = cv2.integral2(self.get_gray(),
+                                                  sdepth = cv2.CV_64F,
+                                                  sqdepth = cv2.CV_64F)
+                sums.flags.writeable = False
+                square_sums.flags.writeable = False
+                self._integrals = (sums, square_sums)
+            return self._integrals
+
+    def get_pyramid_level(self, levels):
+        """Returns the read only float32 grayscale version of the room diagram
+        halved levels times with cv2.pyrDown, starting from the largest level
+        below it already computed.
+
+
+        Keyword argument:
+
+        levels -- The number (int) of times to halve the diagram, at least 0.
+        """
+        assert(isinstance(levels, int) and levels >= 0), ("levels must be an "
+                                                          "int of at least "
+                                                          "0.")
+        with self._lock:
+            if levels == 0:
+                return self.get_gray()
+            if levels not in self._pyramid:
+                level = max([0] + [level for level in self._pyramid
+                                   if level < levels])
+                coarse = self.get_pyramid_level(level)
+                for level in range(level, levels):
+                    coarse = cv2.pyrDown(coarse)
+                    coarse.flags.writeable = False
+                    self._pyramid[level + 1] = coarse
+            return self._pyramid[levels]
+
+    def get_window_variances(self, template_shape):
+        """Returns the read only float64 array integral_window_variances gives
+        for the grayscale version of the room diagram and windows of
+        template_shape. It is kept for every template size, so that chair
+        orientations of the same size and later searches share it.
+
+
+        Keyword argument:
+
+        template_shape -- The (height, width) of the template.
+        """
+        key = tuple(template_shape[:2])
+        with self._lock:
+            if key not in self._window_variances:
+                variances = integral_window_variances(*self.get_integrals(),
+                                                      key)
+                variances.flags.writeable = False
+                self._window_variances[key] = variances
+            return self._window_variances[key]
+
+def __pad_for_template(gray, template_shape):
+    """Private helper padding gray with zeros so that correlating it with a
+    template of template_shape gives a result the size of gray whose values
+    correspond to the template's center, as skimage's pad_input does.
+    """
+    height, width = template_shape
+    return cv2.copyMakeBorder(gray, height // 2, height - 1 - height // 2,
+                              width // 2, width - 1 - width // 2,
+                              cv2.BORDER_CONSTANT, value = 0)
+
+def __match_opencv(gray, template):
+    """Private helper computing the normalized cross correlation with
+    cv2.matchTemplate, which switches to DFT correlation for large templates
+    by itself.
+    """
+    padded = __pad_for_template(gray, template.shape)
+    return cv2.matchTemplate(padded, template, cv2.TM_CCOEFF_NORMED)
+
+def __window_variances(img, template_shape):
+    """Private helper returning the window variances of img for
+    template_shape, kept by an ImagePlane img or computed from new integral
+    images otherwise.
+    """
+    if isinstance(img, ImagePlane):
+        return img.get_window_variances(template_shape)
+    sums, square_sums = cv2.integral2(to_grayscale(img), sdepth = cv2.CV_64F,
+                                      sqdepth = cv2.CV_64F)
+    return integral_window_variances(sums, square_sums, template_shape)
+
+def __match_fft(gray, template, variances):
+    """Private helper computing the normalized cross correlation with one FFT
+    convolution, for the correlation with the zero mean template, normalized
+    by the window variances of the image from integral images.
+    """
+    padded = __pad_for_template(gray, template.shape).astype(np.float64)
+    template = template.astype(np.float64)
+    centered = template - template.mean()
+    numerator = fftconvolve(padded, centered[::-1, ::-1], mode = 'valid')
+    denominator = np.sqrt(variances * np.sum(centered ** 2))
+    result = np.zeros(numerator.shape, dtype = np.float32)
+    #Flat windows have no correlation, as in skimage and cv2
+    valid = denominator > 1e-6 * max(denominator.max(), 1e-12)
+    result[valid] = numerator[valid] / denominator[valid]
+    return result
+
+def match_template(img, template, method = "opencv"):
+    """Returns a float32 array the size of img holding the normalized cross
+    correlation of the grayscale versions of img and template, where each
+    value corresponds to the template centered on that pixel. Areas outside
+    img count as black, so the result matches skimage's match_template with
+    pad_input = True.
+
+
+    Keyword arguments:
+
+    img -- The cv2 image or ImagePlane of the room diagram.
+
+    template -- The cv2 image of the chair orientation to look for.
+
+    method -- One of MATCHING_METHODS (str). "opencv" uses cv2.matchTemplate
+    with TM_CCOEFF_NORMED, "fft" uses an FFT convolution normalized with
+    integral images, which an ImagePlane img keeps for every template size,
+    and "skimage" the original colour skimage matching, which is much
+    slower.
+    """
+    assert(method in MATCHING_METHODS), ("method must be one of "
+                                         + ", ".join(MATCHING_METHODS) + ".")
+    if method == "skimage":
+        if isinstance(img, ImagePlane):
+            img = img.color
+        result = skimage_match_template(img, template, pad_input = True)
+        if result.ndim == 3:
+            #Only the middle channel plane holds full colour overlaps
+            result = result[:, :, result.shape[2] // 2]
+        return result.astype(np.float32)
+    gray = to_grayscale(img)
+    gray_template = to_grayscale(template)
+    if method == "fft":
+        return __match_fft(gray, gray_template,
+                           __window_variances(img, gray_template.shape))
+    return __match_opencv(gray, gray_template)
+
+def __digest(array):
+    """Private helper returning a hex digest of the bytes, shape and dtype of
+    array.
+    """
+    array = np.ascontiguousarray(array)
+    digest = hashlib.blake2b(digest_size = 16)
+    digest.update(("%s %s" % (array.dtype.str, array.shape)).encode())
+    digest.update(array.reshape(-1).view(np.uint8))
+    return digest.hexdigest()
+
+def __image_digest(img):
+    """Private helper returning the __digest of the room diagram img. An
+    ImagePlane is hashed by its colour image, so that it shares cache files
+    with the image it holds.
+    """
+    if isinstance(img, ImagePlane):
+        img = img.color
+    return __digest(img)
+
+def cached_match_template(img, template, method = "opencv",
+                          cache_dir = None, image_digest = None):
+    """Returns match_template(img, template, method), reading it from a .npy
+    file in cache_dir when the same images were matched before and writing it
+    there otherwise. Files are named after a hash of the bytes of the image
+    and template, so a changed floor or chair orientation never reuses an old
+    result, and are loaded as read only memory maps, so that finding peaks
+    again at another finding_threshold takes milliseconds. The files can be
+    deleted at any time.
+
+
+    Keyword arguments:
+
+    img -- The cv2 image or ImagePlane of the room diagram.
+
+    template -- The cv2 image of the chair orientation to look for.
+
+    method -- One of MATCHING_METHODS (str).
+
+    cache_dir -- The directory (str) to keep the results in, created when
+    needed, or None to not cache.
+
+    image_digest -- The hash (str) of the room diagram img was made from,
+    when the caller hashed it once for several templates, or None to hash
+    img.
+    """
+    if cache_dir is None:
+        return match_template(img, template, method)
+    if image_digest is None:
+        image_digest = __image_digest(img)
+    path = os.path.join(cache_dir, "%s-%s-%s-v%d.npy"
+                        % (image_digest, __digest(template), method,
+                           CACHE_VERSION))
+    try:
+        return np.load(path, mmap_mode = 'r')
+    except (OSError, ValueError):
+        #Missing or unreadable, such as a partly written file
+        pass
+    result = match_template(img, template, method)
+    os.makedirs(cache_dir, exist_ok = True)
+    #Write to a private file first so that other threads never read half of it
+    handle, temporary = tempfile.mkstemp(suffix = ".npy", dir = cache_dir)
+    with os.fdopen(handle, 'wb') as file:
+        np.save(file, result)
+    os.replace(temporary, path)
+    return result
+
+def find_peaks(result, finding_threshold):
+    """Returns an (n, 2) int array of the (row, column) coordinates of the
+    local maxima of result above finding_threshold times its largest value,
+    highest first. This gives exactly what the chair recognition has always
+    used, skimage's peak_local_max(result, min_distance = 1,
+    threshold_rel = finding_threshold), with a cv2.dilate maximum filter that
+    is several times faster than scipy's.
+
+
+    Keyword arguments:
+
+    result -- A 2D array returned by match_template.
+
+    finding_threshold -- A float between 0 and 1.
+    """
+    result = np.asarray(result, dtype = np.float32)
+    peaks = result == cv2.dilate(result, np.ones((3, 3), dtype = np.uint8))
+    #A flat result has no peaks
+    if peaks.all():
+        return np.empty((0, 2), dtype = np.intp)
+    peaks &= result > max(result.min(), finding_threshold * result.max())
+    #Pixels along the edge are never peaks
+    peaks[[0, -1], :] = False
+    peaks[:, [0, -1]] = False
+    #Much faster than np.nonzero on a 2D array
+    indices = np.flatnonzero(peaks)
+    order = np.argsort(-result.reshape(-1)[indices], kind = 'stable')
+    indices = indices[order]
+    return np.stack(np.divmod(indices, result.shape[1]), axis = 1)
+
+def __pyramid(gray, levels):
+    """Private helper returning gray downsampled levels times with
+    cv2.pyrDown.
+    """
+    for level in range(levels):
+        gray = cv2.pyrDown(gray)
+    return gray
+
+def pyramid_levels_for(template_shape, pyramid_levels):
+    """Returns the number (int) of pyramid levels, at most pyramid_levels,
+    that keeps both sides of a template of template_shape at least
+    MIN_PYRAMID_TEMPLATE pixels long.
+
+
+    Keyword arguments:
+
+    template_shape -- The (height, width) of the template.
+
+    pyramid_levels -- The number (int) of levels asked for.
+    """
+    levels = 0
+    while (levels < pyramid_levels
+           and min(template_shape[:2]) // 2 ** (levels + 1)
+           >= MIN_PYRAMID_TEMPLATE):
+        levels += 1
+    return levels
+
+def __refine_candidates(gray, template, candidates, scale):
+    """Private helper computing the full resolution opencv correlation in the
+    REFINE_BLOCK_SIZE blocks that lie within reach of a candidate center found
+    at a level scale times smaller, merging neighbouring blocks of a row into
+    one call. Returns the correlation map, -1 where it was not computed, and a
+    bool mask of the positions whose whole 3 x 3 neighbourhood was computed,
+    where peaks can be told apart exactly as in the exhaustive search.
+    """
+    height, width = gray.shape
+    template_height, template_width = template.shape
+    padded = __pad_for_template(gray, template.shape)
+    result = np.full(gray.shape, -1, dtype = np.float32)
+    computed = np.zeros(gray.shape, dtype = np.uint8)
+    #Coarse peaks are placed within about a coarse pixel of the true peak
+    radius = 2 * scale + 1
+    block_rows = -(-height // REFINE_BLOCK_SIZE)
+    block_columns = -(-width // REFINE_BLOCK_SIZE)
+    needed = np.zeros((block_rows, block_columns), dtype = bool)
+    for row, column in (candidates * scale).tolist():
+        first_row = max(row - radius, 0) // REFINE_BLOCK_SIZE
+        last_row = min(row + radius, height - 1) // REFINE_BLOCK_SIZE
+        first_column = max(column - radius, 0) // REFINE_BLOCK_SIZE
+        last_column = min(column + radius, width - 1) // REFINE_BLOCK_SIZE
+        needed[first_row : last_row + 1, first_column : last_column + 1] = True
+    for block_row in range(block_rows):
+        block_column = 0
+        while block_column < block_columns:
+            if not needed[block_row, block_column]:
+                block_column += 1
+                continue
+            run_end = block_column
+            while run_end < block_columns and needed[block_row, run_end]:
+                run_end += 1
+            row0 = block_row * REFINE_BLOCK_SIZE
+            row1 = min(row0 + REFINE_BLOCK_SIZE, height)
+            column0 = block_column * REFINE_BLOCK_SIZE
+            column1 = min(run_end * REFINE_BLOCK_SIZE, width)
+            window = padded[row0 : row1 + template_height - 1,
+                            column0 : column1 + template_width - 1]
+            result[row0 : row1, column0 : column1] = cv2.matchTemplate(
+                window, template, cv2.TM_CCOEFF_NORMED)
+            computed[row0 : row1, column0 : column1] = 1
+            block_column = run_end
+    core = cv2.erode(computed, np.ones((3, 3), dtype = np.uint8)).astype(bool)
+    return result, core
+
+def find_chairs_pyramid(img, template, finding_threshold,
+                        pyramid_levels = 2, return_scores = False):
+    """Returns an (n, 2) int array of the (row, column) centers of the places
+    in img that match template, found coarse to fine: img and template are
+    both downsampled pyramid_levels times, candidate peaks are found on the
+    small images with a threshold lowered by COARSE_THRESHOLD_FACTOR, and the
+    opencv correlation is then computed at full resolution only in small
+    windows around the candidates. Peaks are taken from those windows with
+    the same rules as find_peaks, relative to the best match in any window.
+    This saves the most time on large plans with few chairs, as densely
+    packed plans need most windows computed anyway, and can miss a chair
+    whose coarse match falls below the lowered threshold. The halved room
+    diagram is kept by an ImagePlane img and reused by later searches.
+
+
+    Keyword arguments:
+
+    img -- The cv2 image or ImagePlane of the room diagram.
+
+    template -- The cv2 image of the chair orientation to look for.
+
+    finding_threshold -- A float between 0 and 1. Higher values find fewer
+    chairs.
+
+    pyramid_levels -- The number (int) of times to halve the images. It is
+    lowered for small templates, see pyramid_levels_for.
+
+    return_scores -- Whether (bool) to also return a float32 array of the
+    correlation at each center, as a (centers, scores) pair.
+    """
+    gray = to_grayscale(img)
+    gray_template = to_grayscale(template)
+    levels = pyramid_levels_for(gray_template.shape, pyramid_levels)
+    if levels == 0:
+        result = __match_opencv(gray, gray_template)
+        points = find_peaks(result, finding_threshold)
+    else:
+        if isinstance(img, ImagePlane):
+            coarse_gray = img.get_pyramid_level(levels)
+        else:
+            coarse_gray = __pyramid(gray, levels)
+        coarse = __match_opencv(coarse_gray, __pyramid(gray_template, levels))
+        candidates = find_peaks(coarse, finding_threshold
+                                * COARSE_THRESHOLD_FACTOR)
+        result, core = __refine_candidates(gray, gray_template, candidates,
+                                           2 ** levels)
+        points = find_peaks(result, finding_threshold)
+        points = points[core[points[:, 0], points[:, 1]]]
+    if return_scores:
+        return points, result[points[:, 0], points[:, 1]]
+    return points
+
+def __tile_window(img, rows, columns, template_shape):
+    """Private helper returning the float32 grayscale part of img, padded with
+    zeros past its edges, whose opencv correlation with a template of
+    template_shape gives the result for the given rows and columns ranges.
+    """
+    template_height, template_width = template_shape
+    height, width = img.shape[:2]
+    row0 = rows[0] - template_height // 2
+    row1 = rows[1] + template_height - 1 - template_height // 2
+    column0 = columns[0] - template_width // 2
+    column1 = columns[1] + template_width - 1 - template_width // 2
+    window = to_grayscale(img[max(row0, 0) : min(row1, height),
+                              max(column0, 0) : min(column1, width)])
+    return cv2.copyMakeBorder(window, max(-row0, 0), max(row1 - height, 0),
+                              max(-column0, 0), max(column1 - width, 0),
+                              cv2.BORDER_CONSTANT, value = 0)
+
+def tile_size_for(template_shape, memory_budget):
+    """Returns the side (int) of the square tiles the tiled search can use on
+    a template of template_shape while staying within memory_budget.
+
+
+    Keyword arguments:
+
+    template_shape -- The (height, width) of the template.
+
+    memory_budget -- The number of megabytes (int or float) a tile may use.
+    """
+    window_side = int((memory_budget * 2 ** 20 / TILE_BYTES_PER_PIXEL) ** 0.5)
+    tile_size = window_side - max(template_shape[:2]) - 2
+    assert(tile_size >= 16), ("memory_budget is too small for a "
+                              + "x".join(map(str, template_shape[:2]))
+                              + " template.")
+    return tile_size
+
+def find_chairs_tiled(img, template, finding_threshold, memory_budget = 256,
+                      return_scores = False):
+    """Returns an (n, 2) int array of the (row, column) centers of the places
+    in img that match template, highest first, the same peaks as the
+    exhaustive opencv search up to float rounding, while only ever holding
+    the grayscale image and correlation of one square tile at a time. Each
+    tile owns the peaks in its own area and is correlated with a one pixel
+    border of its neighbours, so that peaks on the seams between tiles are
+    found exactly once. Peaks are kept while they pass finding_threshold
+    times the best match seen so far and filtered again against the best
+    match of the whole image at the end. As img is only ever sliced, it may
+    also be a read only np.memmap of a plan too large to load. An ImagePlane
+    is searched through its colour image, which takes less memory than its
+    grayscale version.
+
+
+    Keyword arguments:
+
+    img -- The cv2 image or ImagePlane of the room diagram.
+
+    template -- The cv2 image of the chair orientation to look for.
+
+    finding_threshold -- A float between 0 and 1. Higher values find fewer
+    chairs.
+
+    memory_budget -- The number of megabytes (int or float) a tile may use,
+    which bounds the memory used independently of the size of img.
+
+    return_scores -- Whether (bool) to also return a float32 array of the
+    correlation at each center, as a (centers, scores) pair.
+    """
+    if isinstance(img, ImagePlane):
+        img = img.color
+    gray_template = to_grayscale(template)
+    tile_size = tile_size_for(gray_template.shape, memory_budget)
+    height, width = img.shape[:2]
+    best = -np.inf
+    worst = np.inf
+    scores = np.empty(0, dtype = np.float32)
+    coordinates = np.empty((0, 2), dtype = np.intp)
+    for row0 in range(0, height, tile_size):
+        for column0 in range(0, width, tile_size):
+            row1 = min(row0 + tile_size, height)
+            column1 = min(column0 + tile_size, width)
+            #One pixel of the neighbouring tiles for the maximum filter
+            rows = (max(row0 - 1, 0), min(row1 + 1, height))
+            columns = (max(column0 - 1, 0), min(column1 + 1, width))
+            result = cv2.matchTemplate(
+                __tile_window(img, rows, columns, gray_template.shape),
+                gray_template, cv2.TM_CCOEFF_NORMED)
+            best = max(best, float(result.max()))
+            worst = min(worst, float(result.min()))
+            peaks = result == cv2.dilate(result,
+                                         np.ones((3, 3), dtype = np.uint8))
+            peaks &= result > finding_threshold * best
+            #Only keep the peaks this tile owns, away from the image's edge
+            owned = np.zeros(peaks.shape, dtype = bool)
+            owned[max(row0, 1) - rows[0] : min(row1, height - 1) - rows[0],
+                  max(column0, 1) - columns[0]
+                  : min(column1, width - 1) - columns[0]] = True
+            peaks &= owned
+            tile_coordinates = np.transpose(np.nonzero(peaks))
+            tile_coordinates += (rows[0], columns[0])
+            scores = np.concatenate((scores, result[peaks]))
+            coordinates = np.concatenate((coordinates, tile_coordinates))
+            keep = scores > finding_threshold * best
+            scores = scores[keep]
+            coordinates = coordinates[keep]
+    #A flat result has no peaks
+    if best == worst:
+        keep = np.zeros(len(scores), dtype = bool)
+    else:
+        keep = scores > max(worst, finding_threshold * best)
+    scores = scores[keep]
+    coordinates = coordinates[keep]
+    order = np.lexsort((coordinates[:, 1], coordinates[:, 0], -scores))
+    if return_scores:
+        return coordinates[order], scores[order]
+    return coordinates[order]
+
+def find_chairs(img, template, finding_threshold, method = "opencv",
+                pyramid_levels = 0, memory_budget = None,
+                return_scores = False, cache_dir = None,
+                image_digest = None):
+    """Returns an (n, 2) int array of the (row, column) centers of the places
+    in img that match template, using cached_match_template and find_peaks,
+    find_chairs_pyramid when pyramid_levels is above 0 or find_chairs_tiled
+    when a memory_budget is given.
+
+
+    Keyword arguments:
+
+    img -- The cv2 image or ImagePlane of the room diagram.
+
+    template -- The cv2 image of the chair orientation to look for.
+
+    finding_threshold -- A float between 0 and 1. Higher values find fewer
+    chairs.
+
+    method -- One of MATCHING_METHODS (str), used by the exhaustive search.
+
+    pyramid_levels -- The number (int) of pyramid levels for a coarse to fine
+    search, 0 for the exhaustive search.
+
+    memory_budget -- The number of megabytes (int or float) each tile of a
+    tiled search may use, or None to search the whole image at once.
+
+    return_scores -- Whether (bool) to also return a float32 array of the
+    correlation at each center, as a (centers, scores) pair.
+
+    cache_dir -- The directory (str) cached_match_template keeps the
+    correlation of the exhaustive search in, or None to not cache. The
+    pyramid and tiled searches never compute the whole correlation and are
+    not cached.
+
+    image_digest -- The hash (str) of the room diagram for the cache, see
+    cached_match_template.
+    """
+    if memory_budget is not None:
+        assert(pyramid_levels == 0), ("The tiled search cannot be combined "
+                                      "with the pyramid search.")
+        return find_chairs_tiled(img, template, finding_threshold,
+                                 memory_budget, return_scores)
+    if pyramid_levels > 0:
+        return find_chairs_pyramid(img, template, finding_threshold,
+                                   pyramid_levels, return_scores)
+    result = cached_match_template(img, template, method, cache_dir,
+                                   image_digest)
+    points = find_peaks(result, finding_threshold)
+    if return_scores:
+        return points, result[points[:, 0], points[:, 1]]
+    return points
+
+def __map_templates(function, templates, workers):
+    """Private helper returning the list of function(template) for every
+    template in templates, run on a pool of workers threads, or one per CPU
+    core if workers is None, in the order of templates.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(templates)))
+    if workers == 1:
+        return [function(template) for template in templates]
+    with ThreadPoolExecutor(max_workers = workers) as pool:
+        return list(pool.map(function, templates))
+
+def find_chairs_by_type(img, templates, finding_threshold, method = "opencv",
+                        workers = None, pyramid_levels = 0,
+                        memory_budget = None, return_scores = False,
+                        cache_dir = None):
+    """Returns a list holding, for every template in templates, the (n, 2) int
+    array of (row, column) centers find_chairs gives for it, or its
+    (centers, scores) pair if return_scores is True. The templates are
+    matched in parallel on a pool of workers threads, which OpenCV and NumPy
+    allow by releasing the GIL, and the results are returned in the order of
+    templates so that they do not depend on which thread finishes first.
+
+
+    Keyword arguments:
+
+    img -- The cv2 image or ImagePlane of the room diagram. An ImagePlane
+    keeps its grayscale version and pyramid levels for later searches.
+
+    templates -- A list of cv2 images of the chair orientations to look for.
+
+    finding_threshold -- A float between 0 and 1. Higher values find fewer
+    chairs.
+
+    method -- One of MATCHING_METHODS (str).
+
+    workers -- The number (int) of threads to use. None uses one per CPU
+    core.
+
+    pyramid_levels -- The number (int) of pyramid levels for a coarse to fine
+    search, 0 for the exhaustive search.
+
+    memory_budget -- The number of megabytes (int or float) each tile of a
+    tiled search may use, or None to search the whole image at once. Every
+    worker holds its own tile.
+
+    return_scores -- Whether (bool) to also return the correlation at each
+    center.
+
+    cache_dir -- The directory (str) to cache the correlation of every
+    template in, or None to not cache.
+    """
+    #Hash the room diagram as given once instead of once per template
+    image_digest = None if cache_dir is None else __image_digest(img)
+    #Convert once, and find the window variances once per template size,
+    #instead of once per template; tiles are still converted one at a time
+    if not isinstance(img, ImagePlane):
+        img = ImagePlane(img)
+    return __map_templates(lambda template: find_chairs(img, template,
+                                                        finding_threshold,
+                                                        method,
+                                                        pyramid_levels,
+                                                        memory_budget,
+                                                        return_scores,
+                                                        cache_dir,
+                                                        image_digest),
+                           templates, workers)
+
+def match_templates(img, templates, method = "opencv", workers = None,
+                    cache_dir = None):
+    """Returns a list holding, for every template in templates, the
+    correlation map cached_match_template gives for it, matched in parallel
+    like find_chairs_by_type. The chairs can then be found again at any
+    finding_threshold with find_chairs_in_results without matching again.
+
+
+    Keyword arguments:
+
+    img -- The cv2 image or ImagePlane of the room diagram.
+
+    templates -- A list of cv2 images of the chair orientations to look for.
+
+    method -- One of MATCHING_METHODS (str).
+
+    workers -- The number (int) of threads to use. None uses one per CPU
+    core.
+
+    cache_dir -- The directory (str) to cache the correlation of every
+    template in, or None to not cache.
+    """
+    image_digest = None if cache_dir is None else __image_digest(img)
+    if not isinstance(img, ImagePlane):
+        img = ImagePlane(img)
+    return __map_templates(lambda template: cached_match_template(
+                               img, template, method, cache_dir,
+                               image_digest),
+                           templates, workers)
+
+def find_chairs_in_results(results, finding_threshold):
+    """Returns a list holding, for every correlation map in results, the
+    (centers, scores) pair of the (n, 2) int array of the (row, column)
+    centers find_peaks gives for it and the float32 array of the correlation
+    at each center.
+
+
+    Keyword arguments:
+
+    results -- A list of correlation maps returned by match_templates.
+
+    finding_threshold -- A float between 0 and 1. Higher values find fewer
+    chairs.
+    """
+    found = []
+    for result in results:
+        points = find_peaks(result, finding_threshold)
+        found.append((points, np.asarray(result)[points[:, 0], points[:, 1]]))
+    return found
+
+def template_bank(template, angles = (0,), scales = (1,)):
+    """Returns a list of (angle, scale, variant, mask) tuples holding the
+    grayscale template rotated by every angle in angles and resized by every
+    scale in scales. Rotated or resized variants sit in the middle of an odd
+    sized square large enough for any angle, with a float32 mask that is 1
+    over the pixels the template covers and 0 elsewhere, so that only those
+    pixels are compared. The variant at angle 0 and scale 1 is template
+    itself with a mask of ones, which matches exactly as match_template does.
+
+
+    Keyword arguments:
+
+    template -- The cv2 image of the chair orientation to look for.
+
+    angles -- The angles (int or float, in degrees) to rotate template by,
+    counterclockwise as shown on screen, as cv2.getRotationMatrix2D does.
+
+    scales -- The factors (int or float) to resize template by.
+    """
+    gray = to_grayscale(template)
+    height, width = gray.shape
+    bank = []
+    for scale in scales:
+        for angle in angles:
+            if angle % 360 == 0 and scale == 1:
+                bank.append((angle, scale, gray,
+                             np.ones(gray.shape, dtype = np.float32)))
+                continue
+            side = int(np.ceil(np.hypot(height, width) * scale)) // 2 * 2 + 1
+            matrix = cv2.getRotationMatrix2D(((width - 1) / 2,
+                                              (height - 1) / 2),
+                                             angle, scale)
+            matrix[:, 2] += ((side - width) / 2, (side - height) / 2)
+            variant = cv2.warpAffine(gray, matrix, (side, side),
+                                     flags = cv2.INTER_LINEAR)
+            coverage = cv2.warpAffine(np.ones(gray.shape, dtype = np.float32),
+                                      matrix, (side, side),
+                                      flags = cv2.INTER_LINEAR)
+            #Pixels blended with the outside of template are left out
+            mask = (coverage > 0.99).astype(np.float32)
+            bank.append((angle, scale, variant * mask, mask))
+    return bank
+
+def match_template_bank(img, bank):
+    """Returns a (best, best_variant) pair of arrays the size of img holding,
+    for every pixel, the highest normalized cross correlation of any variant
+    of bank centered on it and the index (int) of that variant in bank. The
+    correlations are computed with FFTs over the masked pixels of each
+    variant. The FFTs of img and of its square are computed once and shared
+    by all variants, and the sums of img under each distinct mask once and
+    shared by the variants with that mask, so that most variants cost one
+    FFT and one inverse FFT. Variants without a mask are normalized with the
+    integral images of img instead, kept by an ImagePlane img. Areas outside
+    img count as black, as in match_template.
+
+
+    Keyword arguments:
+
+    img -- The cv2 image or ImagePlane of the room diagram.
+
+    bank -- A list of (angle, scale, variant, mask) tuples returned by
+    template_bank.
+    """
+    gray = to_grayscale(img).astype(np.float64)
+    height, width = gray.shape
+    bank_height = max(variant.shape[0] for angle, scale, variant, mask in bank)
+    bank_width = max(variant.shape[1] for angle, scale, variant, mask in bank)
+    padded = __pad_for_template(gray, (bank_height, bank_width))
+    fft_shape = [scipy_fft.next_fast_len(length, real = True)
+                 for length in padded.shape]
+    image_spectrum = scipy_fft.rfft2(padded, fft_shape)
+    #Only needed by masks that are not plain rectangles
+    square_spectrum = None
+    best = np.full(gray.shape, -1, dtype = np.float32)
+    best_variant = np.zeros(gray.shape, dtype = np.int16)
+    #Rotations 180 (or, for square templates, 90) degrees apart cover the
+    #same pixels, so the sums under their masks are only computed once
+    variants_by_mask = {}
+    for index, (angle, scale, variant, mask) in enumerate(bank):
+        key = (mask.shape, mask.tobytes())
+        variants_by_mask.setdefault(key, []).append(index)
+    for indices in variants_by_mask.values():
+        mask = bank[indices[0]][3].astype(np.float64)
+        mask_height, mask_width = mask.shape
+        count = mask.sum()
+        #Correlating is convolving with the flipped kernel, whose full
+        #output is shifted by the kernel size
+        rows = slice(bank_height // 2 - mask_height // 2 + mask_height - 1,
+                     None)
+        columns = slice(bank_width // 2 - mask_width // 2 + mask_width - 1,
+                        None)
+
+        def correlate(spectrum, kernel_spectrum):
+            full = scipy_fft.irfft2(spectrum * kernel_spectrum, fft_shape)
+            return full[rows, columns][:height, :width]
+
+        if count == mask.size:
+            #Plain rectangles are summed with integral images
+            variance = __window_variances(img, mask.shape)
+        else:
+            if square_spectrum is None:
+                square_spectrum = scipy_fft.rfft2(padded ** 2, fft_shape)
+            mask_spectrum = scipy_fft.rfft2(mask[::-1, ::-1], fft_shape)
+            window_sum = correlate(image_spectrum, mask_spectrum)
+            variance = np.maximum(correlate(square_spectrum, mask_spectrum)
+                                  - window_sum ** 2 / count, 0)
+            del window_sum
+        for index in indices:
+            variant = bank[index][2]
+            centered = mask * (variant - (variant * mask).sum() / count)
+            numerator = correlate(image_spectrum,
+                                  scipy_fft.rfft2(centered[::-1, ::-1],
+                                                  fft_shape))
+            denominator = np.sqrt(variance * np.sum(centered ** 2))
+            result = np.zeros(gray.shape, dtype = np.float32)
+            #Flat windows have no correlation, as in skimage and cv2
+            valid = denominator > 1e-6 * max(denominator.max(), 1e-12)
+            result[valid] = numerator[valid] / denominator[valid]
+            better = result > best
+            best[better] = result[better]
+            best_variant[better] = index
+    return best, best_variant
+
+def match_template_banks(img, banks, workers = None):
+    """Returns a list holding the (best, best_variant) pair
+    match_template_bank gives for every bank in banks, matched in parallel
+    like find_chairs_by_type.
+
+
+    Keyword arguments:
+
+    img -- The cv2 image or ImagePlane of the room diagram.
+
+    banks -- A list of banks returned by template_bank, one per chair
+    orientation.
+
+    workers -- The number (int) of threads to use. None uses one per CPU
+    core.
+    """
+    if not isinstance(img, ImagePlane):
+        img = ImagePlane(img)
+    return __map_templates(lambda bank: match_template_bank(img, bank),
+                           banks, workers)
+
+def find_chairs_in_banks(results, banks, finding_threshold):
+    """Returns a list holding, for every (best, best_variant) pair in
+    results, a (centers, scores, poses) triple of the (n, 2) int array of the
+    (row, column) centers find_peaks gives for best, the float32 array of the
+    correlation at each center and an (n, 2) float array of the (angle,
+    scale) of the variant of the matching bank in banks that scored best
+    there.
+
+
+    Keyword arguments:
+
+    results -- A list of (best, best_variant) pairs returned by
+    match_template_banks.
+
+    banks -- The list of banks results was matched with.
+
+    finding_threshold -- A float between 0 and 1. Higher values find fewer
+    chairs.
+    """
+    found = []
+    for (best, best_variant), bank in zip(results, banks):
+        poses = np.array([(angle, scale)
+                          for angle, scale, variant, mask in bank],
+                         dtype = np.float64)
+        points = find_peaks(best, finding_threshold)
+        found.append((points, best[points[:, 0], points[:, 1]],
+                      poses[best_variant[points[:, 0], points[:, 1]]]))
+    return found
+
+def __intersection_areas(polygons, first, second):
+    """Private helper returning a float array of the area of the
+    intersection of every pair of polygons[first] and polygons[second].
+    Detections of one chair orientation are translated copies of the same
+    polygon, so the intersection of two detections only depends on their two
+    shapes and their offset, and GEOS is only called once for each, which
+    neighbouring peaks share.
+    """
+    if len(first) == 0:
+        return np.empty(0)
+    coordinates, index = shapely.get_coordinates(polygons,
+                                                 return_index = True)
+    starts = np.searchsorted(index, np.arange(len(polygons)))
+    origins = coordinates[starts]
+    relative = np.round(coordinates - origins[index], 6)
+    shapes = {}
+    shape_ids = np.array([shapes.setdefault(points.tobytes(), len(shapes))
+                          for points in np.split(relative, starts[1:])])
+    #Integer keys sort far faster than np.unique does on rows
+    keys = np.column_stack((shape_ids[first], shape_ids[second],
+                            np.round((origins[second] - origins[first])
+                                     * 1e6))).astype(np.int64)
+    order = np.lexsort(keys.T)
+    sorted_keys = keys[order]
+    new_keys = np.concatenate(([True], np.any(sorted_keys[1:]
+                                              != sorted_keys[:-1], axis = 1)))
+    inverse = np.empty(len(first), dtype = np.intp)
+    inverse[order] = np.cumsum(new_keys) - 1
+    representatives = order[new_keys]
+    return shapely.area(shapely.intersection(
+        polygons[first[representatives]],
+        polygons[second[representatives]]))[inverse]
+
+def suppress_duplicates(polygons, scores, max_overlap = 0.5,
+                        min_distance = None):
+    """Returns a sorted int array of the indices of the detections to keep
+    when several of them cover the same chair, whether as neighbouring peaks
+    of one chair orientation or under different orientations. Detections are
+    visited from the highest score down, and each one kept removes every
+    remaining detection whose polygon overlaps its own by an intersection
+    over union above max_overlap or, when min_distance is given, whose
+    polygon centroid is closer than min_distance to its own.
+
+
+    Keyword arguments:
+
+    polygons -- A list of the shapely Polygons of the detections, placed
+    within the room diagram.
+
+    scores -- A list or array of the score (float) of each detection, such as
+    its correlation with its chair orientation.
+
+    max_overlap -- The largest intersection over union (float between 0 and
+    1) two kept detections may have.
+
+    min_distance -- The smallest distance (int or float, in pixels) between
+    the centroids of two kept detections, which may be exactly min_distance
+    apart, or None to only use max_overlap.
+    """
+    assert(len(polygons) == len(scores)), ("polygons and scores must have "
+                                           "the same length.")
+    count = len(polygons)
+    if count == 0:
+        return np.empty(0, dtype = np.intp)
+    polygons = np.array(polygons, dtype = object)
+    #Pairs whose bounding boxes meet; the box bound below rules out the rest
+    #more cheaply than an intersects predicate would
+    first, second = STRtree(polygons).query(polygons)
+    #Overlap is symmetric, so each pair is measured once
+    pairs = first < second
+    first = first[pairs]
+    second = second[pairs]
+    areas = shapely.area(polygons)
+    bounds = shapely.bounds(polygons)
+    #The intersection is at most the overlap of the bounding boxes and the
+    #smaller area, which bounds the intersection over union from above; only
+    #pairs whose bound exceeds max_overlap need an exact GEOS intersection
+    box_overlap = (np.clip(np.minimum(bounds[first, 2], bounds[second, 2])
+                           - np.maximum(bounds[first, 0], bounds[second, 0]),
+                           0, None)
+                   * np.clip(np.minimum(bounds[first, 3], bounds[second, 3])
+                             - np.maximum(bounds[first, 1],
+                                          bounds[second, 1]), 0, None))
+    area_sums = areas[first] + areas[second]
+    bound = np.minimum(box_overlap, np.minimum(areas[first], areas[second]))
+    candidates = bound > max_overlap * np.maximum(area_sums - bound, 1e-12)
+    first = first[candidates]
+    second = second[candidates]
+    intersections = __intersection_areas(polygons, first, second)
+    #The union's area follows from the intersection's without GEOS
+    overlaps = intersections / np.maximum(area_sums[candidates]
+                                          - intersections, 1e-12)
+    duplicates = overlaps > max_overlap
+    first = first[duplicates]
+    second = second[duplicates]
+    #Each detection lists every detection it duplicates
+    first, second = (np.concatenate((first, second)),
+                     np.concatenate((second, first)))
+    if min_distance is not None:
+        centroids = shapely.centroid(polygons)
+        near_first, near_second = STRtree(centroids).query(
+            centroids, predicate = 'dwithin', distance = min_distance)
+        #dwithin also matches centroids exactly min_distance apart, which
+        #may both be kept
+        near = ((near_first != near_second)
+                & (shapely.distance(centroids[near_first],
+                                    centroids[near_second]) < min_distance))
+        first = np.concatenate((first, near_first[near]))
+        second = np.concatenate((second, near_second[near]))
+    #Group every detection's duplicates together
+    order = np.argsort(first, kind = 'stable')
+    duplicate_starts = np.searchsorted(first[order], np.arange(count + 1))
+    duplicates_of = second[order]
+    suppressed = np.zeros(count, dtype = bool)
+    for index in np.argsort(-np.asarray(scores), kind = 'stable').tolist():
+        if suppressed[index]:
+            continue
+        suppressed[duplicates_of[duplicate_starts[index]
+                                 : duplicate_starts[index + 1]]] = True
+    return np.nonzero(~suppressed)[0]
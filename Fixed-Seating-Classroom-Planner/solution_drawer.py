@@ -0,0 +1,596 @@
+import cv2
+import numpy as np
+import os
+import shapely
+import zlib
+from xml.sax.saxutils import escape, quoteattr
+
+SOLUTION_RENDERERS = ("opencv", "matplotlib", "svg", "pdf")
+
+# BGR versions of the matplotlib colours the solution diagram has always
+# used
+UNUSED_FILL_COLOR = (230, 216, 173) #lightblue
+UNUSED_LINE_COLOR = (255, 0, 0) #blue
+USED_FILL_COLOR = (0, 165, 255) #orange
+USED_LINE_COLOR = (0, 165, 255) #orange
+RADIUS_COLOR = (139, 0, 0) #darkblue
+LABEL_COLOR = (0, 0, 255) #red
+FILL_ALPHA = 0.6
+
+# Bits of subpixel precision given to cv2's drawing functions
+SHIFT = 4
+# Length in pixels of one dash and the gap after it on a radius circle
+DASH_PERIOD = 12
+# Fraction of DASH_PERIOD drawn
+DASH_FRACTION = 0.6
+# Straight segments each dash is drawn with
+DASH_SEGMENTS = 4
+MIN_DASHES = 8
+LABEL_MARGIN = 10
+LABEL_FONT = cv2.FONT_HERSHEY_SIMPLEX
+# Label height as a fraction of the diagram's height, kept readable on small
+# diagrams
+LABEL_HEIGHT_FRACTION = 0.02
+MIN_LABEL_SCALE = 0.6
+# Height of capital letters as a fraction of the font size, used to size the
+# label of the vector diagrams like the opencv one
+CAP_HEIGHT = 0.7
+MIN_LABEL_FONT_SIZE = 12
+# Suffix of the PNG copy of the room diagram an SVG diagram refers to
+SVG_BACKGROUND_SUFFIX = "_diagram.png"
+# Distance from a cubic Bezier curve's end points to its control points, as
+# a fraction of the radius, for the curve to follow a quarter circle
+BEZIER_CIRCLE = 0.5523
+
+def __fixed_point(points):
+    """Private helper returning the float points as the int32 fixed point
+    coordinates cv2 draws with SHIFT bits of subpixel precision.
+    """
+    return np.round(np.asarray(points) * (1 << SHIFT)).astype(np.int32)
+
+def __polygon_points(polygons):
+    """Private helper returning a list holding the fixed point exterior of
+    every shapely polygon in polygons, read with one vectorized call.
+    """
+    if len(polygons) == 0:
+        return []
+    coordinates, index = shapely.get_coordinates(polygons,
+                                                 return_index = True)
+    return np.split(__fixed_point(coordinates),
+                    np.flatnonzero(np.diff(index)) + 1)
+
+def __polygon_coordinates(polygons):
+    """Private helper returning a list holding the float exterior points of
+    every shapely polygon in polygons, read with one vectorized call.
+    """
+    if len(polygons) == 0:
+        return []
+    coordinates, index = shapely.get_coordinates(polygons,
+                                                 return_index = True)
+    return np.split(coordinates, np.flatnonzero(np.diff(index)) + 1)
+
+def __dashed_circles(centers, radius):
+    """Private helper returning a list of the fixed point polylines of the
+    dashes of a circle of radius around every (x, y) center in centers.
+    """
+    dashes = max(MIN_DASHES, int(2 * np.pi * radius // DASH_PERIOD))
+    starts = np.arange(dashes) * 2 * np.pi / dashes
+    steps = np.linspace(0, 2 * np.pi / dashes * DASH_FRACTION, DASH_SEGMENTS)
+    angles = starts[:, None] + steps[None, :]
+    arc = radius * np.stack((np.cos(angles), np.sin(angles)), axis = -1)
+    points = np.asarray(centers, dtype = np.float64)[:, None, None, :] + arc
+    return list(__fixed_point(points).reshape(-1, DASH_SEGMENTS, 2))
+
+def draw_solution(img, polygons, middles, in_solution, radius, label):
+    """Returns a copy of the cv2 image img with the seating drawn on it at
+    img's own resolution: the seats that should not be used filled light
+    blue, the seats that should be used filled orange with a dashed circle
+    of radius around them, and label in the top left corner. Each kind of
+    shape is drawn with a single cv2 call for all seats.
+
+
+    Keyword arguments:
+
+    img -- The cv2 image of the room diagram. It is not written on.
+
+    polygons -- A list of the shapely Polygons of every seat.
+
+    middles -- A list of the shapely Points at the middle of every seat.
+
+    in_solution -- A bool array marking the seats that should be used.
+
+    radius -- The social distancing radius (int or float) in pixels.
+
+    label -- The text (str) to write in the top left corner.
+    """
+    assert(len(polygons) == len(middles)
+           == len(in_solution)), ("polygons, middles and in_solution must "
+                                  "have the same length.")
+    in_solution = np.asarray(in_solution, dtype = bool)
+    points = __polygon_points(polygons)
+    used = [points[i] for i in np.flatnonzero(in_solution)]
+    unused = [points[i] for i in np.flatnonzero(~in_solution)]
+    drawn = img.copy()
+    overlay = img.copy()
+    if unused:
+        cv2.fillPoly(overlay, unused, UNUSED_FILL_COLOR, cv2.LINE_AA, SHIFT)
+    if used:
+        cv2.fillPoly(overlay, used, USED_FILL_COLOR, cv2.LINE_AA, SHIFT)
+    #Pixels outside every seat are the same in both and stay as they are
+    cv2.addWeighted(overlay, FILL_ALPHA, drawn, 1 - FILL_ALPHA, 0,
+                    dst = drawn)
+    del overlay
+    if unused:
+        cv2.polylines(drawn, unused, True, UNUSED_LINE_COLOR, 1, cv2.LINE_AA,
+                      SHIFT)
+    if used:
+        cv2.polylines(drawn, used, True, USED_LINE_COLOR, 1, cv2.LINE_AA,
+                      SHIFT)
+        centers = [(middles[i].x, middles[i].y)
+                   for i in np.flatnonzero(in_solution)]
+        cv2.polylines(drawn, __dashed_circles(centers, radius), False,
+                      RADIUS_COLOR, 1, cv2.LINE_AA, SHIFT)
+    scale = max(MIN_LABEL_SCALE, LABEL_HEIGHT_FRACTION * img.shape[0]
+                / cv2.getTextSize(label, LABEL_FONT, 1, 1)[0][1])
+    thickness = max(1, int(round(scale)))
+    (text_width, text_height), baseline = cv2.getTextSize(label, LABEL_FONT,
+                                                          scale, thickness)
+    cv2.putText(drawn, label, (LABEL_MARGIN, LABEL_MARGIN + text_height),
+                LABEL_FONT, scale, LABEL_COLOR, thickness, cv2.LINE_AA)
+    return drawn
+
+def __plot_solution(img, polygons, middles, in_solution, radius, label,
+                    solution_name, solution_dpi):
+    """Private helper plotting the seating onto a new matplotlib figure and
+    saving it at solution_dpi. The seats that should and should not be used
+    each get one collection of outlines and one of filled polygons, and the
+    radius circles one EllipseCollection, so that the figure holds five
+    artists however many seats the room has.
+    """
+    #Only this renderer needs matplotlib
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import (EllipseCollection, LineCollection,
+                                        PolyCollection)
+
+    # set axis tick size
+    plt.rc('xtick', labelsize = 4)
+    plt.rc('ytick', labelsize = 4)
+    fig, ax = plt.subplots(dpi = solution_dpi)
+    plt.axis('off')
+
+    # set axis line size
+    for axis in ['top', 'bottom', 'left', 'right']:
+        ax.spines[axis].set_linewidth(0.5)
+
+    in_solution = np.asarray(in_solution, dtype = bool)
+    outlines = [np.asarray(polygon.exterior.coords) for polygon in polygons]
+    for used, line_color, face_color, edge_color, zorder in (
+            (False, 'blue', 'lightblue', 'darkblue', 2),
+            (True, 'orange', 'orange', 'darkred', 3)):
+        seats = [outlines[i] for i in np.flatnonzero(in_solution == used)]
+        if not seats:
+            continue
+        ax.add_collection(LineCollection(seats, colors = line_color,
+                                         alpha = 1, linewidths = 0.2,
+                                         capstyle = 'round',
+                                         zorder = zorder))
+        ax.add_collection(PolyCollection(seats, alpha = 0.6,
+                                         facecolors = face_color,
+                                         edgecolors = edge_color,
+                                         linewidths = 0.15,
+                                         zorder = zorder))
+    centers = [(middles[i].x, middles[i].y)
+               for i in np.flatnonzero(in_solution)]
+    if centers:
+        #Circles never widened the plotted area, so leave the limits alone
+        ax.add_collection(EllipseCollection(2 * radius, 2 * radius, 0,
+                                            units = 'xy',
+                                            offsets = centers,
+                                            offset_transform = ax.transData,
+                                            facecolors = 'none',
+                                            edgecolors = 'darkblue',
+                                            linestyles = '--',
+                                            linewidths = 0.2, zorder = 4),
+                          autolim = False)
+
+    plt.text(10, 10, label,
+             fontsize = 6, color = 'red',
+             horizontalalignment = 'left',
+             verticalalignment = 'top')
+    ax.imshow(img)
+    plt.savefig(solution_name + ".jpg", orientation = 'portrait',
+                format = 'jpg',
+                dpi = solution_dpi)
+    plt.close(fig)
+
+def __label_font_size(img):
+    """Private helper returning the font size, in pixels of img, of the label
+    of a vector diagram.
+    """
+    return max(MIN_LABEL_FONT_SIZE,
+               LABEL_HEIGHT_FRACTION * img.shape[0] / CAP_HEIGHT)
+
+def __svg_color(color):
+    """Private helper returning the SVG hex code of the BGR color."""
+    return "#%02x%02x%02x" % tuple(reversed(color))
+
+def write_solution_svg(img, polygons, middles, in_solution, radius, label,
+                       solution_name):
+    """Writes the seating as the SVG file solution_name + ".svg", drawn over
+    the room diagram, which is saved beside it as solution_name +
+    SVG_BACKGROUND_SUFFIX and referred to by its file name. The seats are
+    written to the file one at a time as polygons, the radius circles as
+    circles and the label as text, so the diagram can be printed at any size
+    and the file's size does not depend on any dpi. Keep both files in the
+    same folder.
+
+
+    Keyword arguments:
+
+    img -- The cv2 image of the room diagram.
+
+    polygons -- A list of the shapely Polygons of every seat.
+
+    middles -- A list of the shapely Points at the middle of every seat.
+
+    in_solution -- A bool array marking the seats that should be used.
+
+    radius -- The social distancing radius (int or float) in pixels.
+
+    label -- The text (str) to write in the top left corner.
+
+    solution_name -- The filename (str), without its extension, to save the
+    diagram as.
+    """
+    in_solution = np.asarray(in_solution, dtype = bool)
+    height, width = img.shape[:2]
+    background = solution_name + SVG_BACKGROUND_SUFFIX
+    written = cv2.imwrite(background, img)
+    assert(written), "The room diagram could not be written."
+    font_size = __label_font_size(img)
+    outlines = __polygon_coordinates(polygons)
+    with open(solution_name + ".svg", "w", encoding = "utf-8") as file:
+        file.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                   '<svg xmlns="http://www.w3.org/2000/svg" '
+                   'xmlns:xlink="http://www.w3.org/1999/xlink" '
+                   'width="%d" height="%d" viewBox="0 0 %d %d">\n'
+                   % (width, height, width, height))
+        file.write('<image x="0" y="0" width="%d" height="%d" '
+                   'xlink:href=%s/>\n'
+                   % (width, height, quoteattr(os.path.basename(background))))
+        for used, fill_color, line_color in (
+                (False, UNUSED_FILL_COLOR, UNUSED_LINE_COLOR),
+                (True, USED_FILL_COLOR, USED_LINE_COLOR)):
+            file.write('<g fill="%s" fill-opacity="%g" stroke="%s" '
+                       'stroke-width="1">\n'
+                       % (__svg_color(fill_color), FILL_ALPHA,
+                          __svg_color(line_color)))
+            for i in np.flatnonzero(in_solution == used):
+                file.write('<polygon points="%s"/>\n'
+                           % " ".join("%.2f,%.2f" % (x, y)
+                                      for x, y in outlines[i].tolist()))
+            file.write('</g>\n')
+        file.write('<g fill="none" stroke="%s" stroke-width="1" '
+                   'stroke-dasharray="%g %g">\n'
+                   % (__svg_color(RADIUS_COLOR),
+                      DASH_PERIOD * DASH_FRACTION,
+                      DASH_PERIOD * (1 - DASH_FRACTION)))
+        for i in np.flatnonzero(in_solution):
+            file.write('<circle cx="%.2f" cy="%.2f" r="%.2f"/>\n'
+                       % (middles[i].x, middles[i].y, radius))
+        file.write('</g>\n')
+        file.write('<text x="%d" y="%.2f" font-family="sans-serif" '
+                   'font-size="%.2f" fill="%s">%s</text>\n'
+                   % (LABEL_MARGIN, LABEL_MARGIN + CAP_HEIGHT * font_size,
+                      font_size, __svg_color(LABEL_COLOR), escape(label)))
+        file.write('</svg>\n')
+
+
+class _PdfWriter():
+    """_PdfWriter is a private class used to write a PDF file one object at
+    a time. Only the byte offset of each object is kept, for the cross
+    reference table written at the end, so that nothing else written needs
+    to be held in memory.
+
+
+    Instance variables:
+
+    file -- The file (opened for writing bytes) being written.
+
+    offsets -- A dict mapping the number (int) of every object written to
+    its byte offset in file.
+
+    _compressor -- The zlib compressor of the stream being written, or None.
+
+    _stream_length -- The number (int) of compressed bytes written to the
+    stream being written.
+
+
+    Public Methods:
+
+    write -- Writes a str to file.
+
+    begin_object -- Starts a new object.
+
+    end_object -- Ends the current object.
+
+    begin_stream -- Starts a new object holding a compressed stream.
+
+    write_stream -- Compresses a str or bytes into the current stream.
+
+    end_stream -- Ends the current stream and returns its length.
+
+    finish -- Writes the cross reference table and the trailer.
+    """
+
+    def __init__(self, file):
+        """Initializes an instance of the _PdfWriter class and writes the
+        PDF header.
+
+
+        Keyword argument:
+
+        file -- A file opened for writing bytes.
+        """
+        self.file = file
+        self.offsets = {}
+        self._compressor = None
+        self._stream_length = 0
+        #The binary comment marks the file as binary to transfer programs
+        self.file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def write(self, text):
+        """Writes text (str) to file."""
+        self.file.write(text.encode("latin-1"))
+
+    def begin_object(self, number):
+        """Starts the object numbered number (int)."""
+        self.offsets[number] = self.file.tell()
+        self.write("%d 0 obj\n" % number)
+
+    def end_object(self):
+        """Ends the current object."""
+        self.write("\nendobj\n")
+
+    def begin_stream(self, number, length_number, dictionary = ""):
+        """Starts the object numbered number (int) holding a Flate compressed
+        stream, whose length is left to the object numbered length_number
+        (int), as it is only known once the stream is written.
+
+
+        Keyword arguments:
+
+        number -- The number (int) of the object.
+
+        length_number -- The number (int) of the object to write the length
+        of the stream in.
+
+        dictionary -- Entries (str) to add to the stream's dictionary.
+        """
+        self.begin_object(number)
+        self.write("<< %s /Filter /FlateDecode /Length %d 0 R >>\nstream\n"
+                   % (dictionary, length_number))
+        self._compressor = zlib.compressobj()
+        self._stream_length = 0
+
+    def write_stream(self, data):
+        """Compresses data (str or bytes) into the current stream."""
+        if isinstance(data, str):
+            data = data.encode("latin-1")
+        compressed = self._compressor.compress(data)
+        self.file.write(compressed)
+        self._stream_length += len(compressed)
+
+    def end_stream(self):
+        """Ends the current stream and its object, and returns the length
+        (int) of the stream.
+        """
+        compressed = self._compressor.flush()
+        self.file.write(compressed)
+        self._stream_length += len(compressed)
+        self._compressor = None
+        self.write("\nendstream")
+        self.end_object()
+        return self._stream_length
+
+    def finish(self, root_number):
+        """Writes the cross reference table of every object written and the
+        trailer naming the object numbered root_number (int) as the
+        document's catalog.
+        """
+        start = self.file.tell()
+        size = max(self.offsets) + 1
+        self.write("xref\n0 %d\n0000000000 65535 f \n" % size)
+        for number in range(1, size):
+            self.write("%010d 00000 n \n" % self.offsets[number])
+        self.write("trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n"
+                   "%%%%EOF\n" % (size, root_number, start))
+
+
+def __pdf_color(color):
+    """Private helper returning the PDF RGB operands of the BGR color."""
+    return " ".join("%.3f" % (value / 255) for value in reversed(color))
+
+def __pdf_text(text):
+    """Private helper returning text as a PDF literal string."""
+    return "(%s)" % (text.replace("\\", "\\\\").replace("(", "\\(")
+                     .replace(")", "\\)"))
+
+def write_solution_pdf(img, polygons, middles, in_solution, radius, label,
+                       solution_name):
+    """Writes the seating as the single page PDF file solution_name +
+    ".pdf", one point per pixel of the room diagram, which is embedded
+    losslessly as the page's background. The seats are streamed into the
+    page one at a time as filled paths, the radius circles as dashed Bezier
+    curves and the label as Helvetica text, so the diagram can be printed at
+    any size and the file's size does not depend on any dpi.
+
+
+    Keyword arguments:
+
+    img -- The cv2 image of the room diagram.
+
+    polygons -- A list of the shapely Polygons of every seat.
+
+    middles -- A list of the shapely Points at the middle of every seat.
+
+    in_solution -- A bool array marking the seats that should be used.
+
+    radius -- The social distancing radius (int or float) in pixels.
+
+    label -- The text (str) to write in the top left corner.
+
+    solution_name -- The filename (str), without its extension, to save the
+    diagram as.
+    """
+    in_solution = np.asarray(in_solution, dtype = bool)
+    height, width = img.shape[:2]
+    if img.ndim == 2:
+        pixels = img
+        color_space = "/DeviceGray"
+    else:
+        pixels = cv2.cvtColor(img, cv2.COLOR_BGRA2RGB if img.shape[2] == 4
+                              else cv2.COLOR_BGR2RGB)
+        color_space = "/DeviceRGB"
+    font_size = __label_font_size(img)
+    outlines = __polygon_coordinates(polygons)
+    control = BEZIER_CIRCLE * radius
+    catalog, pages, page, content, content_length = 1, 2, 3, 4, 5
+    image, image_length, font, fill_state = 6, 7, 8, 9
+    with open(solution_name + ".pdf", "wb") as file:
+        pdf = _PdfWriter(file)
+        pdf.begin_object(catalog)
+        pdf.write("<< /Type /Catalog /Pages %d 0 R >>" % pages)
+        pdf.end_object()
+        pdf.begin_object(pages)
+        pdf.write("<< /Type /Pages /Kids [%d 0 R] /Count 1 >>" % page)
+        pdf.end_object()
+        pdf.begin_object(page)
+        pdf.write("<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] "
+                  "/Resources << /XObject << /Diagram %d 0 R >> "
+                  "/Font << /Label %d 0 R >> "
+                  "/ExtGState << /Fill %d 0 R >> >> /Contents %d 0 R >>"
+                  % (pages, width, height, image, font, fill_state,
+                     content))
+        pdf.end_object()
+        pdf.begin_stream(content, content_length)
+        #Draw the diagram, then flip the page so that y grows downwards in
+        #pixels as in img
+        pdf.write_stream("q %d 0 0 %d 0 0 cm /Diagram Do Q\n"
+                         "1 0 0 -1 0 %d cm 1 w\n" % (width, height, height))
+        for used, fill_color, line_color in (
+                (False, UNUSED_FILL_COLOR, UNUSED_LINE_COLOR),
+                (True, USED_FILL_COLOR, USED_LINE_COLOR)):
+            pdf.write_stream("q /Fill gs %s rg %s RG\n"
+                             % (__pdf_color(fill_color),
+                                __pdf_color(line_color)))
+            for i in np.flatnonzero(in_solution == used):
+                points = outlines[i].tolist()
+                pdf.write_stream("%.2f %.2f m " % tuple(points[0])
+                                 + "".join("%.2f %.2f l " % (x, y)
+                                           for x, y in points[1:])
+                                 + "h B\n")
+            pdf.write_stream("Q\n")
+        pdf.write_stream("q %s RG [%g %g] 0 d\n"
+                         % (__pdf_color(RADIUS_COLOR),
+                            DASH_PERIOD * DASH_FRACTION,
+                            DASH_PERIOD * (1 - DASH_FRACTION)))
+        for i in np.flatnonzero(in_solution):
+            x, y = middles[i].x, middles[i].y
+            pdf.write_stream(
+                "%.2f %.2f m "
+                "%.2f %.2f %.2f %.2f %.2f %.2f c "
+                "%.2f %.2f %.2f %.2f %.2f %.2f c "
+                "%.2f %.2f %.2f %.2f %.2f %.2f c "
+                "%.2f %.2f %.2f %.2f %.2f %.2f c S\n"
+                % (x + radius, y,
+                   x + radius, y + control, x + control, y + radius,
+                   x, y + radius,
+                   x - control, y + radius, x - radius, y + control,
+                   x - radius, y,
+                   x - radius, y - control, x - control, y - radius,
+                   x, y - radius,
+                   x + control, y - radius, x + radius, y - control,
+                   x + radius, y))
+        pdf.write_stream("Q\n")
+        #Text is flipped back so that it is not drawn upside down
+        pdf.write_stream("BT /Label %.2f Tf %s rg 1 0 0 -1 %d %.2f Tm %s Tj "
+                         "ET\n" % (font_size, __pdf_color(LABEL_COLOR),
+                                    LABEL_MARGIN,
+                                    LABEL_MARGIN + CAP_HEIGHT * font_size,
+                                    __pdf_text(label)))
+        length = pdf.end_stream()
+        pdf.begin_object(content_length)
+        pdf.write("%d" % length)
+        pdf.end_object()
+        pdf.begin_stream(image, image_length,
+                         "/Type /XObject /Subtype /Image /Width %d "
+                         "/Height %d /ColorSpace %s /BitsPerComponent 8"
+                         % (width, height, color_space))
+        for row in range(height):
+            pdf.write_stream(np.ascontiguousarray(pixels[row]).tobytes())
+        length = pdf.end_stream()
+        pdf.begin_object(image_length)
+        pdf.write("%d" % length)
+        pdf.end_object()
+        pdf.begin_object(font)
+        pdf.write("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica "
+                  "/Encoding /WinAnsiEncoding >>")
+        pdf.end_object()
+        pdf.begin_object(fill_state)
+        pdf.write("<< /Type /ExtGState /ca %g >>" % FILL_ALPHA)
+        pdf.end_object()
+        pdf.finish(catalog)
+
+def save_solution(img, polygons, middles, in_solution, radius, label,
+                  solution_name, solution_dpi, renderer = "opencv"):
+    """Draws the seating on the room diagram and saves it as
+    solution_name + ".jpg", or as solution_name + ".svg" or ".pdf" for the
+    vector renderers.
+
+
+    Keyword arguments:
+
+    img -- The cv2 image of the room diagram. It is not written on.
+
+    polygons -- A list of the shapely Polygons of every seat.
+
+    middles -- A list of the shapely Points at the middle of every seat.
+
+    in_solution -- A bool array marking the seats that should be used.
+
+    radius -- The social distancing radius (int or float) in pixels.
+
+    label -- The text (str) to write in the top left corner.
+
+    solution_name -- The filename (str), without its extension, to save the
+    diagram as.
+
+    solution_dpi -- The dpi (int) of the matplotlib figure. Not used by the
+    other renderers.
+
+    renderer -- One of SOLUTION_RENDERERS (str). "opencv" draws straight onto
+    a copy of img with draw_solution and saves it at img's resolution.
+    "matplotlib" plots the seats as matplotlib collections on a figure
+    saved at solution_dpi, which takes longer at high dpi, and is the only
+    part of the tool that needs matplotlib. "svg" and "pdf" write vector
+    diagrams for printing at any size with write_solution_svg and
+    write_solution_pdf.
+    """
+    assert(renderer in SOLUTION_RENDERERS), ("renderer must be one of "
+                                             + ", ".join(SOLUTION_RENDERERS)
+                                             + ".")
+    if renderer == "opencv":
+        drawn = draw_solution(img, polygons, middles, in_solution, radius,
+                              label)
+        written = cv2.imwrite(solution_name + ".jpg", drawn)
+        assert(written), "The solution diagram could not be written."
+    elif renderer == "svg":
+        write_solution_svg(img, polygons, middles, in_solution, radius,
+                           label, solution_name)
+    elif renderer == "pdf":
+        write_solution_pdf(img, polygons, middles, in_solution, radius,
+                           label, solution_name)
+    else:
+        __plot_solution(img, polygons, middles, in_solution, radius, label,
+                        solution_name, solution_dpi)
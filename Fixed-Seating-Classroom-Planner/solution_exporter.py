@@ -0,0 +1,203 @@
+import csv
+import general as cpg
+import json
+import numpy as np
+import os
+import shapely
+
+SOLUTION_EXPORT_FORMATS = ("json", "csv", "parquet")
+# Names the layout of the exported files. The version is raised whenever a
+# field is removed or changes meaning, so that readers can tell them apart.
+SOLUTION_SCHEMA = "classroom-planner-solution"
+SOLUTION_SCHEMA_VERSION = 1
+SEAT_COLUMNS = ("room", "seat", "x", "y", "chair_type", "angle", "scale",
+                "in_solution", "polygon")
+CONFLICT_COLUMNS = ("room", "seat_a", "seat_b")
+COORDINATE_DECIMALS = 2
+
+def solution_metadata(room_info, room):
+    """Returns a dict of the information shared by every seat of the solved
+    room: the schema, the room diagram, the scale and the chair orientations.
+
+
+    Keyword arguments:
+
+    room_info -- The RoomInfo instance of the solved room.
+
+    room -- The name (str) the room is exported under.
+    """
+    scale = room_info.get_scale()
+    image_plane = room_info.get_image_plane()
+    if image_plane is cpg.NOT_SET:
+        image_size = None
+    else:
+        image_size = list(image_plane.color.shape[1::-1])
+    return {"schema" : SOLUTION_SCHEMA,
+            "version" : SOLUTION_SCHEMA_VERSION,
+            "room" : room,
+            "floor" : room_info.parameters_dict["floor"],
+            "image_size" : image_size,
+            "scale" : {"points" : [list(point) for point in scale.points],
+                       "scale_length_pixels" : scale.scale_length_pixels,
+                       "unit_length_pixels" : scale.unit_length_pixels,
+                       "pixels_to_distance" : scale.pixels_to_distance,
+                       "scale_length_units" : scale.scale_length_units,
+                       "units_to_distance" : scale.units_to_distance,
+                       "scale_orientation" : scale.scale_orientation},
+            "chair_types" : [{"points" : [list(point)
+                                          for point in chair_type.points]}
+                             for chair_type in room_info.get_chair_types()],
+            "seats_used" : len(room_info.get_chairs_in_sol())}
+
+def solution_seats(room_info):
+    """Returns a dict mapping each of SEAT_COLUMNS but "room" to a list
+    holding that field of every _Chair of the solved room, in the order of
+    room_info's chairs, which is also the order the conflicts index them in.
+    "chair_type" is the chair orientation's index into the room's chair
+    types and "polygon" is an object array of the chairs' shapely Polygons.
+
+
+    Keyword argument:
+
+    room_info -- The RoomInfo instance of the solved room.
+    """
+    chairs = room_info.get_chairs()
+    #Chairs are matched by identity, as _Chair does not define equality
+    type_indices = {id(chair_type) : index for index, chair_type
+                    in enumerate(room_info.get_chair_types())}
+    chosen = {id(chair) for chair in room_info.get_chairs_in_sol()}
+    points = [chair.polygon_points() for chair in chairs]
+    if chairs:
+        #Build every polygon in one vectorized call
+        rings = shapely.linearrings(np.concatenate(points),
+                                    indices = np.repeat(
+                                        np.arange(len(points)),
+                                        [len(point) for point in points]))
+        polygons = shapely.polygons(rings)
+    else:
+        polygons = np.empty(0, dtype = object)
+    return {"seat" : list(range(len(chairs))),
+            "x" : [int(chair.coords[0]) for chair in chairs],
+            "y" : [int(chair.coords[1]) for chair in chairs],
+            "chair_type" : [type_indices[id(chair.chair_type)]
+                            for chair in chairs],
+            "angle" : [float(chair.angle) for chair in chairs],
+            "scale" : [float(chair.scale) for chair in chairs],
+            "in_solution" : [id(chair) in chosen for chair in chairs],
+            "polygon" : polygons}
+
+def __polygon_lists(polygons):
+    """Private helper returning the exterior points of every shapely polygon
+    in polygons as a list of [x, y] lists, rounded to COORDINATE_DECIMALS.
+    """
+    if len(polygons) == 0:
+        return []
+    coordinates, index = shapely.get_coordinates(polygons,
+                                                 return_index = True)
+    coordinates = np.round(coordinates, COORDINATE_DECIMALS).tolist()
+    bounds = np.concatenate(([0], np.flatnonzero(np.diff(index)) + 1,
+                             [len(index)])).tolist()
+    return [coordinates[start:end]
+            for start, end in zip(bounds[:-1], bounds[1:])]
+
+def __write_json(metadata, seats, conflicts, solution_name):
+    """Private helper writing the solution as a single compact JSON file,
+    solution_name + ".json", with the seats stored by column.
+    """
+    document = dict(metadata)
+    document["seats"] = dict(seats)
+    document["seats"]["polygon"] = __polygon_lists(seats["polygon"])
+    document["conflicts"] = conflicts.tolist()
+    #json.dumps uses the C encoder, which json.dump does not
+    text = json.dumps(document, separators = (",", ":"))
+    with open(solution_name + ".json", "w", encoding = "utf-8") as file:
+        file.write(text)
+
+def __write_csv(metadata, seats, conflicts, solution_name):
+    """Private helper writing the seats and the conflicts as the CSV files
+    solution_name + "_seats.csv" and solution_name + "_conflicts.csv", one
+    row at a time. Polygons are written as WKT, and every row starts with the
+    room's name so that the files of many rooms can be loaded as one table.
+    """
+    room = metadata["room"]
+    seats = dict(seats)
+    seats["polygon"] = shapely.to_wkt(seats["polygon"],
+                                      rounding_precision
+                                      = COORDINATE_DECIMALS)
+    with open(solution_name + "_seats.csv", "w", newline = "",
+              encoding = "utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(SEAT_COLUMNS)
+        writer.writerows(zip([room] * len(seats["seat"]),
+                             *(seats[column]
+                               for column in SEAT_COLUMNS[1:])))
+    with open(solution_name + "_conflicts.csv", "w", newline = "",
+              encoding = "utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(CONFLICT_COLUMNS)
+        writer.writerows([room, seat_a, seat_b]
+                         for seat_a, seat_b in conflicts.tolist())
+
+def __write_parquet(metadata, seats, conflicts, solution_name):
+    """Private helper writing the seats and the conflicts as the Parquet
+    files solution_name + "_seats.parquet" and solution_name +
+    "_conflicts.parquet", with the same columns as the CSV files but each
+    polygon as a list of [x, y] points. The metadata is kept as JSON in the
+    schema of both files.
+    """
+    #Only this export needs pyarrow
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema_metadata = {SOLUTION_SCHEMA : json.dumps(metadata)}
+    room = metadata["room"]
+    columns = dict(seats)
+    columns["room"] = [room] * len(seats["seat"])
+    columns["polygon"] = pa.array(__polygon_lists(seats["polygon"]),
+                                  type = pa.list_(pa.list_(pa.float64())))
+    seat_table = pa.table({column : columns[column]
+                           for column in SEAT_COLUMNS})
+    pq.write_table(seat_table.replace_schema_metadata(schema_metadata),
+                   solution_name + "_seats.parquet")
+    conflict_table = pa.table({"room" : [room] * len(conflicts),
+                               "seat_a" : conflicts[:, 0],
+                               "seat_b" : conflicts[:, 1]})
+    pq.write_table(conflict_table.replace_schema_metadata(schema_metadata),
+                   solution_name + "_conflicts.parquet")
+
+def export_solution(room_info, solution_name, formats):
+    """Writes the solved room in each of formats, beside its solution
+    diagram, for other tools to read the seats from without looking at the
+    diagram. Every format holds each chair's position, chair orientation,
+    polygon and whether it is in the solution, the conflicting pairs of
+    chairs, and the room's scale. "json" writes solution_name + ".json",
+    while "csv" and "parquet" write a table of seats and one of conflicts as
+    solution_name + "_seats" and solution_name + "_conflicts". "parquet"
+    needs pyarrow.
+
+
+    Keyword arguments:
+
+    room_info -- The RoomInfo instance of the room, which must already have
+    been solved.
+
+    solution_name -- The filename (str), without its extension, of the
+    solution diagram. Its file name is also the name of the room in the
+    exported files.
+
+    formats -- The formats (list of str) to export, from
+    SOLUTION_EXPORT_FORMATS.
+    """
+    assert(all(export_format in SOLUTION_EXPORT_FORMATS
+               for export_format in formats)), ("formats must be from "
+                                                "SOLUTION_EXPORT_FORMATS.")
+    assert(room_info.get_chairs_in_sol()
+           is not cpg.NOT_SET), "room_info must already have been solved."
+    conflicts = room_info.get_conflict_edges()
+    metadata = solution_metadata(room_info, os.path.basename(solution_name))
+    seats = solution_seats(room_info)
+    writers = {"json" : __write_json,
+               "csv" : __write_csv,
+               "parquet" : __write_parquet}
+    for export_format in formats:
+        writers[export_format](metadata, seats, conflicts, solution_name)